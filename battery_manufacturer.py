@@ -3,49 +3,49 @@ import mesa
 class BatteryManufacturer(mesa.Agent):
     """An agent representing a battery manufacturer."""
     
-    def __init__(self, unique_id, model):
+    def __init__(self, unique_id, model, capacity=None, cost=1.0):
         super().__init__(unique_id, model)
+        self.capacity = capacity  # Batteries produced per year (None: unlimited)
+        self.cost = cost  # Relative production cost, used to route orders
         self.batteries_produced = 0
         self.recycled_materials_used = 0
+        self.pending_batteries = 0  # Ordered one at a time, not yet produced
         
     def produce_battery(self):
-        """Produce a new battery."""
+        """Order a new battery; it is produced in bulk by settle()."""
+        self.pending_batteries += 1
+    
+    def settle(self):
+        """Produce all batteries ordered one at a time since the last settle."""
+        if self.pending_batteries:
+            count, self.pending_batteries = self.pending_batteries, 0
+            self.manufacture_batteries(count)
+    
+    def produce_batteries(self, count):
+        """Order a batch of `count` batteries, produced now unless they must wait for settle()."""
+        if self.capacity is not None:
+            self.pending_batteries += count  # Routed by the model's CapacityRouter
+            return
+        if self.model.recycler_router is not None:
+            # Routed recycling only reaches the pool when the model settles,
+            # so production waits for it
+            self.pending_batteries += count
+            return
+        self.manufacture_batteries(count)
+    
+    def manufacture_batteries(self, count):
+        """Produce a batch of `count` new batteries, drawing on recycled materials first."""
         # Increment batteries produced count
-        self.batteries_produced += 1
-        
-        # Check availability of recycled materials
-        available_recycled_lithium = self.model.recycled_lithium
-        available_recycled_cobalt = self.model.recycled_cobalt
-        
-        # Calculate how much material is needed
-        lithium_needed = self.model.lithium_per_battery
-        cobalt_needed = self.model.cobalt_per_battery
+        self.batteries_produced += count
         
-        # Use recycled materials first, then virgin materials
-        recycled_lithium_used = min(available_recycled_lithium, lithium_needed)
-        recycled_cobalt_used = min(available_recycled_cobalt, cobalt_needed)
-        
-        # Update model's recycled materials tracking (current available pool)
-        self.model.recycled_lithium -= recycled_lithium_used
-        self.model.recycled_cobalt -= recycled_cobalt_used
-        
-        # Update model's cumulative tracking of recycled materials used
-        self.model.total_lithium_used_from_recycled += recycled_lithium_used
-        self.model.total_cobalt_used_from_recycled += recycled_cobalt_used
-        
-        # Calculate new materials needed
-        new_lithium_needed = lithium_needed - recycled_lithium_used
-        new_cobalt_needed = cobalt_needed - recycled_cobalt_used
-        
-        # Update model's new materials tracking
-        self.model.new_lithium_required += new_lithium_needed
-        self.model.new_cobalt_required += new_cobalt_needed
+        # The ledger uses recycled materials first, then virgin materials
+        recycled_used = self.model.ledger.produce_batteries(count)
         
         # Track recycled materials used
-        self.recycled_materials_used += (recycled_lithium_used + recycled_cobalt_used)
+        self.recycled_materials_used += recycled_used.sum()
     
     def step(self):
         """Actions during each step (year)."""
         # Reset counters for the new year
         self.batteries_produced = 0
-        self.recycled_materials_used = 0 
\ No newline at end of file
+        self.recycled_materials_used = 0
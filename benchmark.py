@@ -0,0 +1,224 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from constants import EV_GROWTH_RATES
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Reference configuration each sweep dimension is varied around
+BASE_PARAMS = {
+    "initial_ev_owners": 1000,
+    "end_year": 2050,
+    "initial_battery_manufacturers": 3,
+    "initial_recycling_companies": 1,
+    "seed": 0,
+}
+
+# One-at-a-time sweeps over the dimensions that drive model cost
+SWEEPS = {
+    "initial_ev_owners": [1000, 10000, 50000],
+    "end_year": [2050, 2075, 2100],
+    "growth_scale": [1.0, 1.5, 2.0],
+    "companies": [(3, 1), (30, 10), (300, 100)],
+}
+
+# Metric name -> True if higher is better
+METRICS = {
+    "steps_per_sec": True,
+    "agent_steps_per_sec": True,
+    "peak_rss_mb": False,
+    "allocated_blocks_per_year": False,
+    "collected_blocks_per_year": False,
+}
+
+# Cases are re-run until at least MIN_CASE_RUNS runs and MIN_CASE_SECONDS
+# of timed steps, and their median throughput is reported, so that timer
+# and scheduling noise on short runs does not show up as regressions
+MIN_CASE_RUNS = 3
+MIN_CASE_SECONDS = 2.0
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.2  # Flag changes more than 20% in the wrong direction
+
+def case_params(dimension, value):
+    """Model parameters for one point of a sweep."""
+    params = dict(BASE_PARAMS)
+    if dimension == "growth_scale":
+        params["ev_growth_rates"] = {period: rate * value for period, rate in EV_GROWTH_RATES.items()}
+    elif dimension == "companies":
+        params["initial_battery_manufacturers"], params["initial_recycling_companies"] = value
+    else:
+        params[dimension] = value
+    return params
+
+def benchmark_cases(backends):
+    """All (name, params) cases for the given owner backends."""
+    cases = []
+    for backend in backends:
+        for dimension, values in SWEEPS.items():
+            for value in values:
+                value_label = "x".join(map(str, value)) if isinstance(value, tuple) else value
+                params = {**case_params(dimension, value), "owner_backend": backend}
+                cases.append((f"{backend}/{dimension}={value_label}", params))
+    return cases
+
+def time_run(params):
+    """Build and run one model; returns (model, steps, agent steps, setup and run seconds)."""
+    from model import EVBatteryModel
+    
+    # Garbage left by earlier runs would otherwise be collected during this one
+    gc.collect()
+    start = time.perf_counter()
+    model = EVBatteryModel(**params)
+    setup_seconds = time.perf_counter() - start
+    
+    steps = 0
+    agent_steps = 0
+    companies = len(model.manufacturers) + len(model.recyclers)
+    start = time.perf_counter()
+    while model.running:
+        agent_steps += model.num_ev_owners + companies
+        model.step()
+        steps += 1
+    return model, steps, agent_steps, setup_seconds, time.perf_counter() - start
+
+def count_blocks(params):
+    """Run one model sampling live memory blocks around every step.
+    
+    Automatic garbage collection is off during the run and the collector
+    runs after every step instead, so each step's growth in live blocks
+    splits into cyclic garbage the collector frees and memory retained by
+    the model. Blocks freed during the step by reference counting are not
+    seen: CPython keeps no running count of allocations. Returns (model,
+    steps, allocated blocks, collected blocks), with block counts summed
+    over steps.
+    """
+    from model import EVBatteryModel
+    
+    gc.collect()
+    model = EVBatteryModel(**params)
+    steps = allocated = collected = 0
+    gc.disable()
+    try:
+        while model.running:
+            before = sys.getallocatedblocks()
+            model.step()
+            after = sys.getallocatedblocks()
+            gc.collect()
+            allocated += after - before
+            collected += after - sys.getallocatedblocks()
+            steps += 1
+    finally:
+        gc.enable()
+    return model, steps, allocated, collected
+
+def run_case(params, min_runs=MIN_CASE_RUNS, min_seconds=MIN_CASE_SECONDS):
+    """Run one model to completion and measure it (called in a fresh process).
+    
+    Memory is measured on a first, untimed run (see count_blocks). Seeded
+    runs are identical, so the case is then re-run until `min_runs` runs
+    and `min_seconds` of steps have been timed, and throughput is the
+    median over the runs.
+    """
+    model, steps, allocated, collected = count_blocks(params)
+    
+    peak_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    final_ev_owners = model.num_ev_owners
+    del model
+    
+    _, _, agent_steps, setup_seconds, seconds = time_run(params)
+    durations = [seconds]
+    while len(durations) < min_runs or sum(durations) < min_seconds:
+        durations.append(time_run(params)[4])
+    seconds = statistics.median(durations)
+    
+    return {
+        "years": steps,
+        "runs": len(durations),
+        "setup_seconds": setup_seconds,
+        "seconds": seconds,
+        "steps_per_sec": steps / seconds,
+        "agent_steps_per_sec": agent_steps / seconds,
+        "peak_rss_mb": peak_rss_mb,
+        # Memory blocks a year leaves allocated, and the part of them that
+        # is cyclic garbage for the collector
+        "allocated_blocks_per_year": allocated / max(steps, 1),
+        "collected_blocks_per_year": collected / max(steps, 1),
+        "final_ev_owners": final_ev_owners,
+    }
+
+def run_benchmarks(cases, repeat=1):
+    """Run each case `repeat` times in its own process and keep the median run."""
+    results = {}
+    context = get_context("spawn")
+    for name, params in cases:
+        runs = []
+        for _ in range(repeat):
+            # A fresh process per run keeps peak RSS and allocations per case
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                runs.append(executor.submit(run_case, params).result())
+        results[name] = sorted(runs, key=lambda run: run["steps_per_sec"])[len(runs) // 2]
+        print(f"  {name:45s} {results[name]['seconds']:8.2f}s "
+              f"{results[name]['steps_per_sec']:10.1f} steps/s "
+              f"{results[name]['agent_steps_per_sec']:14.0f} agent-steps/s")
+    return results
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results against a baseline; return (case, metric, old, new) for regressions."""
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old = baseline[name].get(metric)
+            new = metrics.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark EVBatteryModel scaling and throughput.")
+    parser.add_argument("--backends", nargs="+", default=["agents", "slotted", "vectorized", "cohort", "calendar"])
+    parser.add_argument("--repeat", type=int, default=1, help="processes per case; the median is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    args = parser.parse_args()
+    
+    print("Running benchmarks...")
+    results = run_benchmarks(benchmark_cases(args.backends), repeat=args.repeat)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name}: {metric} {old:.4g} -> {new:.4g}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
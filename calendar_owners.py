@@ -0,0 +1,126 @@
+import numpy as np
+from cohort_owners import influence_levels
+from vectorized_owners import dispatch_batteries, reserve
+
+# Per-owner arrays kept by CalendarEVOwners
+CALENDAR_ARRAYS = ("join_step", "install_step")
+
+# Supported battery lifespan distributions (besides a fixed lifespan)
+LIFESPAN_DISTRIBUTIONS = ("normal", "uniform", "gamma")
+
+def draw_lifespans(rng, count, mean, distribution=None, spread=0.0):
+    """Whole-year battery lifespans (at least one year) with the given mean and standard deviation."""
+    if distribution is None or spread == 0:
+        return np.full(count, mean, dtype=np.int64)
+    if distribution == "normal":
+        lifespans = rng.normal(mean, spread, size=count)
+    elif distribution == "uniform":
+        half_width = spread * np.sqrt(3)
+        lifespans = rng.uniform(mean - half_width, mean + half_width, size=count)
+    elif distribution == "gamma":
+        lifespans = rng.gamma((mean / spread) ** 2, spread ** 2 / mean, size=count)
+    else:
+        raise ValueError(f"Unknown lifespan distribution: {distribution!r}")
+    return np.maximum(np.rint(lifespans), 1).astype(np.int64)
+
+class CalendarEVOwners:
+    """EV owner population advanced by end-of-life events instead of yearly ticks.
+    
+    Each owner's next end-of-life step goes into a step-bucketed calendar
+    queue when its battery is installed, and a step only visits the bucket
+    that is due, so the work per year scales with the batteries retired that
+    year rather than with the fleet. Battery age and network influence are
+    derived on demand from the install and join steps. Lifespans can be
+    drawn per battery (see draw_lifespans) at no extra per-step cost.
+    """
+    
+    def __init__(self, model, battery_ages=(), rng=None, lifespan_distribution=None, lifespan_spread=0.0,
+                 dispatch_rng=None):
+        self.model = model
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dispatch_rng = dispatch_rng if dispatch_rng is not None else self.rng
+        self.lifespan_distribution = lifespan_distribution
+        self.lifespan_spread = lifespan_spread
+        self.influence = influence_levels()
+        
+        # Steps taken so far; owner state is kept as steps at which things happened
+        self.steps = 0
+        capacity = max(len(battery_ages), 16)
+        self.join_step = np.zeros(capacity, dtype=np.int32)
+        self.install_step = np.zeros(capacity, dtype=np.int32)
+        self.size = 0
+        
+        # calendar[step]: arrays of owners whose batteries reach end of life then
+        self.calendar = {}
+        
+        # Batteries replaced during the last step
+        self.batteries_replaced = 0
+        
+        battery_ages = np.asarray(battery_ages, dtype=np.int64)
+        self.add_owners(len(battery_ages), battery_ages)
+    
+    def __len__(self):
+        return self.size
+    
+    def battery_ages(self):
+        """Current battery age of every owner."""
+        return self.steps - self.install_step[:self.size]
+    
+    def network_influence(self, owners=slice(None)):
+        """Network influence of the given owners, from their years of ownership."""
+        years = self.steps - self.join_step[:self.size][owners]
+        return self.influence[np.minimum(years, len(self.influence) - 1)]
+    
+    def schedule(self, owners, battery_ages=0):
+        """Put `owners` with the given battery ages into the calendar by end-of-life step."""
+        lifespans = draw_lifespans(self.rng, len(owners), self.model.battery_lifespan,
+                                   self.lifespan_distribution, self.lifespan_spread)
+        
+        # Batteries already at or past their lifespan are retired at the next step
+        due = self.steps + np.maximum(lifespans - battery_ages, 1)
+        if due.min() == due.max():
+            self.calendar.setdefault(int(due[0]), []).append(owners)
+            return
+        
+        # Bucket by due step with a linear-time sort on the (small) offsets
+        first = int(due.min())
+        offsets = due - first
+        if offsets.max() < 2 ** 16:
+            offsets = offsets.astype(np.uint16)
+        counts = np.bincount(offsets)
+        groups = np.split(owners[np.argsort(offsets, kind="stable")], np.cumsum(counts)[:-1])
+        for offset in np.flatnonzero(counts):
+            self.calendar.setdefault(first + int(offset), []).append(groups[offset])
+    
+    def add_owners(self, count, battery_age=0):
+        """Add `count` new owners (joining now) with the given battery age(s)."""
+        if count <= 0:
+            return
+        reserve(self, CALENDAR_ARRAYS, self.size + count)
+        owners = np.arange(self.size, self.size + count)
+        self.join_step[owners] = self.steps
+        self.install_step[owners] = self.steps - np.asarray(battery_age)
+        self.size += count
+        self.schedule(owners, battery_age)
+    
+    def step(self):
+        """Retire the batteries due this year and schedule their replacements."""
+        self.steps += 1
+        due = self.calendar.pop(self.steps, None)
+        if due is None:
+            self.batteries_replaced = 0
+            return
+        owners = np.concatenate(due)
+        self.batteries_replaced = len(owners)
+        
+        # Batched recycle-or-discard decision, as in end_battery_life
+        adjusted_probability = np.minimum(
+            0.95, self.model.owner_recycling_probability + self.network_influence(owners))
+        recycled = int(np.count_nonzero(self.rng.random(len(owners)) < adjusted_probability))
+        
+        # Every end-of-life owner gets a new battery either way
+        dispatch_batteries(self.model.recyclers, "receive_batteries", recycled, self.dispatch_rng)
+        dispatch_batteries(self.model.manufacturers, "produce_batteries", len(owners), self.dispatch_rng)
+        
+        self.install_step[owners] = self.steps
+        self.schedule(owners)
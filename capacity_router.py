@@ -0,0 +1,62 @@
+import heapq
+
+class CapacityRouter:
+    """Routes each year's batteries to facilities with spare annual capacity.
+    
+    Facilities sit in a binary heap keyed by (cost, -spare capacity), so the
+    cheapest facility with the most room is found in O(log n) even with
+    thousands of facilities. Equally cheap facilities are filled evenly, a
+    level at a time, so a batch costs one heap operation per facility it
+    touches rather than one per battery. Batteries that do not fit wait in a
+    backlog and are routed again, first, the next year.
+    """
+    
+    def __init__(self, facilities, method):
+        self.facilities = facilities
+        self.method = method  # Facility method that processes a routed share
+        self.backlog = 0  # Batteries (or orders) waiting for capacity
+    
+    def settle(self):
+        """Route the batteries facilities received this year, plus the backlog."""
+        arrivals = 0
+        for facility in self.facilities:
+            arrivals += facility.pending_batteries
+            facility.pending_batteries = 0
+        
+        shares = self.route(self.backlog + arrivals)
+        for i, share in shares.items():
+            getattr(self.facilities[i], self.method)(share)
+        self.backlog += arrivals - sum(shares.values())
+    
+    def route(self, count):
+        """Split up to `count` batteries over facilities by cost and spare capacity.
+        
+        Returns a dict of facility index to batteries assigned.
+        """
+        heap = [
+            (facility.cost, -facility.capacity, i)
+            for i, facility in enumerate(self.facilities)
+            if facility.capacity > 0
+        ]
+        heapq.heapify(heap)
+        shares = {}
+        
+        while count and heap:
+            # The cheapest facilities with equal spare capacity, at most `count` of them
+            cost, negative_spare, i = heapq.heappop(heap)
+            spare = -negative_spare
+            group = [i]
+            while heap and len(group) < count and heap[0][:2] == (cost, negative_spare):
+                group.append(heapq.heappop(heap)[2])
+            
+            # Fill the group evenly down to the next equally cheap facility's spare capacity
+            floor = -heap[0][1] if heap and heap[0][0] == cost else 0
+            # (a group cut short at `count` facilities gets one battery each)
+            per_facility = max(1, min(spare - floor, count // len(group)))
+            
+            for j in group:
+                shares[j] = shares.get(j, 0) + per_facility
+                if spare > per_facility:
+                    heapq.heappush(heap, (cost, per_facility - spare, j))
+            count -= per_facility * len(group)
+        return shares
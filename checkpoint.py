@@ -0,0 +1,105 @@
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Constructor parameters stored under a different attribute name on the model
+PARAMETER_ATTRIBUTES = {
+    "battery_lifespan_years": "battery_lifespan",
+}
+
+# Parameters that can be changed on a running model (for a forked branch)
+FORKABLE_PARAMETERS = (
+    "recycling_efficiency",
+    "recycling_efficiency_growth",
+    "owner_recycling_probability",
+    "ev_growth_rates",
+    "lithium_per_battery",
+    "cobalt_per_battery",
+    "battery_lifespan_years",
+    "end_year",
+)
+
+def checkpoint(model):
+    """Snapshot a model (agents, material pools, efficiency, RNG state) as compressed bytes.
+    
+    Instrumented models are rejected: their agents are instances of
+    counting subclasses built for that one model (see
+    StepInstrumentation.agent_class), which pickle cannot find by name, and
+    a running cProfile profiler cannot be pickled either.
+    """
+    if model.instrumentation.enabled:
+        raise ValueError("Instrumented models cannot be checkpointed")
+    return zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+def restore(snapshot):
+    """Rebuild an independent model from checkpoint bytes."""
+    return pickle.loads(zlib.decompress(snapshot))
+
+def run_to_year(model, year):
+    """Step a model until its current year reaches `year` (or it stops)."""
+    while model.running and model.current_year < year:
+        model.step()
+    return model
+
+def checkpoint_at(params, year):
+    """Run a new model with `params` up to `year` and snapshot it."""
+    from model import EVBatteryModel
+    return checkpoint(run_to_year(EVBatteryModel(**params), year))
+
+def fork(snapshot, changes=None, seed=None):
+    """Restore a checkpoint as a new branch with changed parameters.
+    
+    Branches continue from the checkpoint's RNG state unless a `seed` is
+    given, in which case every random stream of the branch is reseeded.
+    """
+    model = restore(snapshot)
+    for name, value in (changes or {}).items():
+        if name not in FORKABLE_PARAMETERS:
+            raise ValueError(f"Parameter {name!r} cannot be changed on a running model")
+        if name == "battery_lifespan_years" and model.owner_backend in ("cohort", "calendar"):
+            raise ValueError(f"The {model.owner_backend} backend cannot change battery lifespan mid-run")
+        setattr(model, PARAMETER_ATTRIBUTES.get(name, name), value)
+        if name in ("lithium_per_battery", "cobalt_per_battery"):
+            material = name.split("_")[0]
+            model.ledger.per_battery[model.ledger.index[material]] = value
+    
+    model.running = model.current_year <= model.end_year
+    
+    if seed is not None:
+        model.reset_randomizer(seed)
+        # Reseed in place so the owner population keeps sharing the generator
+        model.np_random.bit_generator.state = np.random.default_rng(
+            model.random.getrandbits(64)).bit_generator.state
+        if model.common_random_numbers:
+            model.event_random.seed(model.random.getrandbits(64))
+            model.dispatch_rng.bit_generator.state = np.random.default_rng(
+                model.random.getrandbits(64)).bit_generator.state
+    return model
+
+def run_branch(task):
+    """Run one forked branch to completion (used by run_branches)."""
+    from run import run_until_done
+    
+    snapshot, changes, seed = task
+    return run_until_done(fork(snapshot, changes, seed), verbose=False)
+
+def run_branches(snapshot, branches, seed=None, workers=None):
+    """Run what-if branches forked from one checkpoint.
+    
+    `branches` is a list of (name, changes) pairs. The shared prefix is not
+    simulated again: every branch starts from the checkpoint, so its results
+    contain the prefix years followed by its own continuation. With `seed`,
+    branch i is reseeded with seed + i; otherwise all branches continue the
+    checkpoint's random streams. `workers=1` runs branches in this process.
+    """
+    tasks = [
+        (snapshot, changes, None if seed is None else seed + i)
+        for i, (name, changes) in enumerate(branches)
+    ]
+    if workers == 1:
+        results = [run_branch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_branch, tasks))
+    return {name: result for (name, _), result in zip(branches, results)}
@@ -0,0 +1,78 @@
+import numpy as np
+from constants import (
+    NETWORK_INFLUENCE_ANNUAL_INCREASE,
+    MAX_NETWORK_INFLUENCE
+)
+from vectorized_owners import dispatch_batteries
+
+def influence_levels():
+    """Network influence after 0, 1, 2, ... years of ownership, up to the cap.
+    
+    Built by repeated addition so the values match step_owner.
+    """
+    levels = [0]
+    while NETWORK_INFLUENCE_ANNUAL_INCREASE > 0 and levels[-1] < MAX_NETWORK_INFLUENCE:
+        levels.append(min(MAX_NETWORK_INFLUENCE, levels[-1] + NETWORK_INFLUENCE_ANNUAL_INCREASE))
+    return np.array(levels, dtype=np.float64)
+
+def age_cohorts(counts):
+    """Vehicle counts one year later: every battery one year older, owners one influence level up (capped)."""
+    aged = np.zeros_like(counts)
+    aged[1:, 1:] = counts[:-1, :-1]
+    aged[1:, -1] += counts[:-1, -1]
+    return aged
+
+class CohortEVOwners:
+    """EV owner population tracked as a histogram over battery age and influence level.
+    
+    Owners only differ in battery age and years of ownership (which fixes their
+    network influence), so counting vehicles per (age, influence level) cell is
+    enough. Each year the end-of-life cells are split into recycled and
+    discarded batteries with one binomial draw per influence level, so the
+    cost of a step depends on the battery lifespan, not on the fleet size.
+    """
+    
+    def __init__(self, model, battery_ages=(), rng=None):
+        self.model = model
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.influence = influence_levels()
+        
+        # counts[age, level]: vehicles with that battery age and influence level.
+        # Ages never exceed lifespan + 1 because end-of-life batteries are replaced.
+        self.counts = np.zeros((self.model.battery_lifespan + 2, len(self.influence)), dtype=np.int64)
+        battery_ages = np.asarray(battery_ages, dtype=np.int64)
+        self.counts[:, 0] = np.bincount(battery_ages, minlength=len(self.counts))
+        
+        # Batteries replaced during the last step
+        self.batteries_replaced = 0
+    
+    def __len__(self):
+        return int(self.counts.sum())
+    
+    def add_owners(self, count, battery_age=0):
+        """Add `count` new owners with the given battery age and no influence yet."""
+        if count > 0:
+            self.counts[battery_age, 0] += count
+    
+    def step(self):
+        """Advance every cohort by one year."""
+        self.counts = counts = age_cohorts(self.counts)
+        
+        # Batteries at or past their lifespan reach end of life this year
+        lifespan = self.model.battery_lifespan
+        end_of_life = counts[lifespan:].sum(axis=0)
+        self.batteries_replaced = int(end_of_life.sum())
+        if self.batteries_replaced == 0:
+            return
+        
+        # Binomial recycle-or-discard split per influence level
+        adjusted_probability = np.minimum(0.95, self.model.owner_recycling_probability + self.influence)
+        adjusted_probability = np.clip(adjusted_probability, 0, 1)
+        recycled = int(self.rng.binomial(end_of_life, adjusted_probability).sum())
+        
+        dispatch_batteries(self.model.recyclers, "receive_batteries", recycled, self.rng)
+        dispatch_batteries(self.model.manufacturers, "produce_batteries", self.batteries_replaced, self.rng)
+        
+        # Replaced batteries start again at age 0, keeping their owner's influence
+        counts[lifespan:] = 0
+        counts[0] += end_of_life
@@ -0,0 +1,111 @@
+import json
+from operator import attrgetter
+import numpy as np
+import pandas as pd
+from constants import COLLECTOR_FLUSH_INTERVAL
+
+class ColumnarDataCollector:
+    """Model-level data collector backed by preallocated typed column arrays.
+    
+    A lighter stand-in for mesa.DataCollector's model reporters: each reporter
+    writes straight into its own NumPy column, sized up front for the run.
+    With a `path`, columns live in one memory-mapped file (laid out column
+    after column) that is flushed every `flush_interval` rows, so the history
+    does not have to stay in RAM.
+    """
+    
+    def __init__(self, model_reporters, rows, dtypes=None, path=None,
+                 flush_interval=COLLECTOR_FLUSH_INTERVAL):
+        self.columns = list(model_reporters)
+        # Plain attribute names are read with attrgetter instead of a lambda
+        self.reporters = [attrgetter(reporter) if isinstance(reporter, str) else reporter
+                          for reporter in model_reporters.values()]
+        self.dtypes = [np.dtype((dtypes or {}).get(name, np.float64)) for name in self.columns]
+        self.path = path
+        self.flush_interval = flush_interval
+        self.capacity = max(rows, 1)
+        self.rows = 0
+        
+        if path is None:
+            self.data = [np.zeros(self.capacity, dtype=dtype) for dtype in self.dtypes]
+        else:
+            with open(path, "wb") as f:
+                f.truncate(self.capacity * sum(dtype.itemsize for dtype in self.dtypes))
+            self.data = self.map_columns(path, self.dtypes, self.capacity, "r+")
+            self.write_schema()
+    
+    @staticmethod
+    def map_columns(path, dtypes, capacity, mode):
+        """Memory-map one contiguous column per dtype from a collector file."""
+        columns = []
+        offset = 0
+        for dtype in dtypes:
+            columns.append(np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=(capacity,)))
+            offset += capacity * dtype.itemsize
+        return columns
+    
+    def write_schema(self):
+        """Record column names, dtypes and row count next to the data file."""
+        with open(f"{self.path}.json", "w") as f:
+            json.dump({
+                "columns": self.columns,
+                "dtypes": [dtype.str for dtype in self.dtypes],
+                "capacity": self.capacity,
+                "rows": self.rows,
+            }, f)
+    
+    def collect(self, model):
+        """Record every reporter for the model's current state as one row."""
+        if self.rows == self.capacity:
+            self.grow()
+        
+        row = self.rows
+        for column, reporter in zip(self.data, self.reporters):
+            column[row] = reporter(model)
+        self.rows += 1
+        
+        # Flush periodically, and once the file is full (the end of the run)
+        if self.path is not None and (self.rows % self.flush_interval == 0 or self.rows == self.capacity):
+            self.flush()
+    
+    def grow(self):
+        """Double the in-memory columns when a run outlasts its preallocation."""
+        if self.path is not None:
+            raise ValueError(f"Collector file {self.path} is sized for {self.capacity} rows")
+        self.capacity *= 2
+        for i, column in enumerate(self.data):
+            self.data[i] = np.zeros(self.capacity, dtype=column.dtype)
+            self.data[i][:self.rows] = column[:self.rows]
+    
+    def flush(self):
+        """Write collected rows out to the backing file, if there is one."""
+        if self.path is None:
+            return
+        for column in self.data:
+            column.flush()
+        self.write_schema()
+    
+    def __getstate__(self):
+        """Pickle (e.g. for checkpoints) as an in-memory collector.
+        
+        A restored copy must not keep writing into the original run's file.
+        """
+        state = self.__dict__.copy()
+        state["data"] = [np.array(column) for column in self.data]
+        state["path"] = None
+        return state
+    
+    def get_model_vars_dataframe(self):
+        """Collected rows as a DataFrame whose columns are views on the arrays."""
+        return pd.DataFrame({name: column[:self.rows] for name, column in zip(self.columns, self.data)},
+                            copy=False)
+    
+    @staticmethod
+    def load(path):
+        """Open a collector file written by an earlier run as a read-only DataFrame."""
+        with open(f"{path}.json") as f:
+            schema = json.load(f)
+        dtypes = [np.dtype(dtype) for dtype in schema["dtypes"]]
+        data = ColumnarDataCollector.map_columns(path, dtypes, schema["capacity"], "r")
+        return pd.DataFrame({name: column[:schema["rows"]] for name, column in zip(schema["columns"], data)},
+                            copy=False)
@@ -9,6 +9,14 @@ INITIAL_EV_OWNERS = 1000
 INITIAL_BATTERY_MANUFACTURERS = 3
 INITIAL_RECYCLING_COMPANIES = 1
 
+# Facility capacities in batteries per year per company (a number, or one per
+# company): None for unlimited capacity, where each battery is handled by the
+# company its owner picked. With capacities, each year's batteries are routed
+# to the cheapest companies with spare capacity and the rest wait in a backlog.
+RECYCLER_CAPACITY = None
+MANUFACTURER_CAPACITY = None
+FACILITY_COST_SPREAD = 0.0  # Companies' relative costs are drawn from 1 +/- this (0: equal costs)
+
 # Recycling parameters
 RECYCLING_EFFICIENCY_START = 0.6  # Initial recycling efficiency (60%)
 RECYCLING_EFFICIENCY_GROWTH = 0.025  # Annual growth in recycling efficiency (2.5%)
@@ -25,12 +33,62 @@ EV_GROWTH_RATES = {
 # Battery specifications
 LITHIUM_PER_BATTERY = 2.5  # kg of lithium per battery
 COBALT_PER_BATTERY = 6.0  # kg of cobalt per battery
+# Further materials tracked by the material ledger (NMC-type chemistry)
+ADDITIONAL_MATERIALS_PER_BATTERY = {
+    "nickel": 18.0,  # kg of nickel per battery
+    "manganese": 5.6,  # kg of manganese per battery
+}
 BATTERY_LIFESPAN_YEARS = 8  # average years until battery reaches 80% capacity
+# Battery lifespan distribution (calendar owner backend only): None for the
+# fixed lifespan above, or "normal", "uniform" or "gamma" lifespans with that
+# mean and LIFESPAN_SPREAD years standard deviation, drawn per battery
+LIFESPAN_DISTRIBUTION = None
+LIFESPAN_SPREAD = 2.0
+
+# Vehicle retirement ("agents", "slotted" and "vectorized" owner backends):
+# None keeps every vehicle in the fleet, or the mean vehicle lifetime in years.
+# Lifetimes are drawn per vehicle ("normal", "uniform" or "gamma") with
+# VEHICLE_LIFESPAN_SPREAD years standard deviation; a retiring vehicle's final
+# battery is recycled or discarded and its owner slot is reused for new EVs.
+VEHICLE_LIFESPAN_YEARS = None
+VEHICLE_LIFESPAN_DISTRIBUTION = "normal"
+VEHICLE_LIFESPAN_SPREAD = 3.0
+
+# Owner population backend: "agents" (one EVOwner per vehicle),
+# "slotted" (compact per-vehicle records, for long horizons),
+# "vectorized" (NumPy arrays advanced in bulk, for large fleets),
+# "cohort" (vehicle counts per battery age, for very large fleets) or
+# "calendar" (end-of-life events only, for heterogeneous lifespans)
+OWNER_BACKEND = "agents"
+
+# Super-individuals (vectorized backend only): None for one entry per vehicle,
+# or a maximum number of weighted owner entries. Lower budgets run faster but
+# give coarser stochastic resolution.
+AGENT_BUDGET = None
+
+# Common random numbers (all owner backends but "cohort"): owner decisions and
+# company choices use a fixed number of draws per end-of-life event from
+# dedicated streams, so scenarios run with the same seed are paired draw for
+# draw. Usually enabled per ensemble (see ensemble.run_ensemble).
+COMMON_RANDOM_NUMBERS = False
+
+# Data collection: "mesa" (mesa.DataCollector), "columnar" (preallocated
+# NumPy columns, optionally memory-mapped to a file) or "none" (no history,
+# for runs read year by year through streaming.stream_years)
+DATA_COLLECTOR = "mesa"
+COLLECTOR_FLUSH_INTERVAL = 10  # Rows between flushes of a memory-mapped collector
 
 # Network influence parameters
 NETWORK_INFLUENCE_ANNUAL_INCREASE = 0.01  # Annual increase in network influence
 MAX_NETWORK_INFLUENCE = 0.5  # Maximum network influence cap
 
+# Social network (vectorized owner backend only): None for the simple annual
+# increase above, or "small_world", "scale_free" or "random" peer effects
+SOCIAL_NETWORK = None
+NETWORK_MEAN_DEGREE = 6  # Average number of contacts per owner
+NETWORK_REWIRE_PROBABILITY = 0.1  # Share of small-world links rewired at random
+NETWORK_PEER_INFLUENCE = 0.15  # Annual influence gain if all neighbours recycled last year
+
 # Scenario definitions
 SCENARIOS = [
     ("baseline", {}),
@@ -46,6 +104,57 @@ SCENARIOS = [
     })
 ]
 
+# Regions of the multi-region model (see regional_model.py): model parameters
+# per region, plus the share of its recycled material pool a region offers
+# to other regions each year ("export_share", default REGION_EXPORT_SHARE).
+# Regions must share the start and end years.
+REGION_EXPORT_SHARE = 0.0
+REGIONS = [
+    ("EU", {
+        "initial_ev_owners": 400,
+        "owner_recycling_probability": 0.7,
+        "ev_growth_rates": {"2024-2030": 0.12, "2031-2035": 0.12, "2036-2050": 0.05},
+        "export_share": 0.2,
+    }),
+    ("US", {
+        "initial_ev_owners": 300,
+        "owner_recycling_probability": 0.4,
+        "recycling_efficiency_start": 0.5,
+        "ev_growth_rates": {"2024-2030": 0.08, "2031-2035": 0.12, "2036-2050": 0.075},
+        "export_share": 0.1,
+    }),
+    ("China", {
+        "initial_ev_owners": 800,
+        "initial_battery_manufacturers": 6,
+        "initial_recycling_companies": 3,
+        "owner_recycling_probability": 0.6,
+        "ev_growth_rates": {"2024-2030": 0.15, "2031-2035": 0.15, "2036-2050": 0.075},
+    }),
+]
+
+# Ensemble statistics
+RESERVOIR_SIZE = 256  # Replications kept per scenario for quantile estimates
+MIN_REPLICATIONS = 5  # Replications before the precision stopping rule applies
+MAX_REPLICATIONS = 1000  # Hard cap on replications for precision-based runs
+
+# Sharded ensemble jobs (see job_queue.py)
+JOB_SHARD_SIZE = 10  # Runs per shard
+JOB_LEASE_SECONDS = 120  # A shard whose lease is not renewed for this long is reclaimed
+JOB_POLL_SECONDS = 5  # How often idle workers look for reclaimable shards
+
+# Sensitivity analysis
+SENSITIVITY_BOOTSTRAP = 1000  # Bootstrap resamples for confidence intervals
+
 # Simulation parameters
 MAX_SIMULATION_STEPS = 100  # Maximum steps to prevent infinite loops
-PROGRESS_REPORT_INTERVAL = 5  # Report progress every 5 years 
\ No newline at end of file
+PROGRESS_REPORT_INTERVAL = 5  # Report progress every 5 years
+
+# Reproducibility and result caching
+RANDOM_SEED = 2024  # Seed used by run.py so repeated invocations can hit the cache
+CACHE_DIR = ".model_cache"  # Directory for cached model results
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # Evict least recently used runs beyond this size
+
+# Reporting
+REPORT_DIR = "reports"  # Directory for per-scenario figures and the summary table
+REPORT_MAX_POINTS = 200  # Longer series are downsampled to this many points before plotting
+REPORT_WORKERS = 1  # Background processes rendering figures
@@ -0,0 +1,133 @@
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from constants import SCENARIOS
+
+def replication_seed(base_seed, scenario_name, replication):
+    """Seed for one model instance in an ensemble.
+    
+    Derived from the base seed, the scenario name and the replication number
+    only, so it does not depend on worker count, task order or which other
+    scenarios are part of the ensemble.
+    """
+    sequence = np.random.SeedSequence(
+        base_seed, spawn_key=(zlib.crc32(scenario_name.encode()), replication))
+    return int(sequence.generate_state(1, dtype=np.uint64)[0])
+
+def run_replication(task):
+    """Run one (scenario, replication) task and label its results."""
+    from run import run_model
+    
+    name, replication, params, seed, cache = task
+    results = run_model({**params, "seed": seed}, verbose=False, cache=cache)
+    results.insert(0, "Scenario", name)
+    results.insert(1, "Replication", replication)
+    results.insert(2, "Seed", np.uint64(seed))
+    return results
+
+# Seed stream shared by every scenario under common random numbers
+COMMON_STREAM = "common random numbers"
+
+def ensemble_tasks(scenarios, replications, seed, cache, common_random_numbers=False):
+    """(name, replication, params, seed, cache) tasks, by scenario then replication.
+    
+    With common random numbers, every scenario of a replication gets the same
+    seed and runs with the model's common_random_numbers option.
+    """
+    tasks = []
+    for name, params in scenarios:
+        stream = name
+        if common_random_numbers:
+            stream = COMMON_STREAM
+            params = {**params, "common_random_numbers": True}
+        for replication in range(replications):
+            tasks.append((name, replication, params, replication_seed(seed, stream, replication), cache))
+    return tasks
+
+def iter_ensemble(scenarios=SCENARIOS, replications=1, seed=None, workers=None, cache=None,
+                  common_random_numbers=False):
+    """Like run_ensemble, but yield each run's results, in order, as soon as it is done."""
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    tasks = ensemble_tasks(scenarios, replications, seed, cache, common_random_numbers)
+    
+    if workers == 1:
+        for task in tasks:
+            yield run_replication(task)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_replication, tasks)
+
+def run_ensemble(scenarios=SCENARIOS, replications=1, seed=None, workers=None, cache=None,
+                 common_random_numbers=False):
+    """Run every scenario `replications` times, spread over a process pool.
+    
+    Each model instance gets its own seed (see replication_seed), so results
+    for a given `seed` are identical however many workers are used. Returns
+    one DataFrame per run, ordered by scenario and then replication. With a
+    ResultCache, runs already on disk are loaded instead of simulated.
+    
+    With `common_random_numbers`, the scenarios of one replication share
+    their random streams instead, so that scenario differences can be
+    estimated from paired runs (see paired_differences).
+    """
+    return list(iter_ensemble(scenarios, replications, seed, workers, cache, common_random_numbers))
+
+def merge_results(frames):
+    """Combine per-run frames from run_ensemble into one long table."""
+    return pd.concat(frames, ignore_index=True)
+
+def scenario_results(frames, replication=0):
+    """Pick one replication per scenario, keyed by name as analyze_results expects."""
+    return {
+        frame["Scenario"].iloc[0]: frame
+        for frame in frames
+        if frame["Replication"].iloc[0] == replication
+    }
+
+def paired_differences(frames, reference="baseline", outputs=None):
+    """Differences of each scenario from `reference`, paired by replication.
+    
+    `outputs` maps names to functions of one run's results (by default the
+    sensitivity analysis outputs). For every other scenario and output,
+    returns the mean difference, the variance of the paired differences and
+    the standard error of the mean, next to the variance the difference of
+    two independent runs would have. Their ratio is the variance reduction
+    from common random numbers, i.e. how many times fewer replications reach
+    the same precision.
+    """
+    if outputs is None:
+        from sensitivity import DEFAULT_OUTPUTS as outputs
+    
+    values = {}  # (scenario, replication) -> output values
+    for frame in frames:
+        key = (frame["Scenario"].iloc[0], frame["Replication"].iloc[0])
+        values[key] = np.array([output(frame) for output in outputs.values()], dtype=np.float64)
+    replications = sorted(replication for scenario, replication in values if scenario == reference)
+    if not replications:
+        raise ValueError(f"No runs of the reference scenario {reference!r}")
+    baseline = np.stack([values[reference, replication] for replication in replications])
+    
+    rows = []
+    for scenario in dict.fromkeys(scenario for scenario, _ in values):
+        if scenario == reference:
+            continue
+        runs = np.stack([values[scenario, replication] for replication in replications])
+        differences = runs - baseline
+        ddof = 1 if len(replications) > 1 else 0
+        variance = differences.var(axis=0, ddof=ddof)
+        independent = runs.var(axis=0, ddof=ddof) + baseline.var(axis=0, ddof=ddof)
+        for i, output in enumerate(outputs):
+            rows.append({
+                "Scenario": scenario,
+                "Output": output,
+                "Replications": len(replications),
+                "Mean Difference": differences[:, i].mean(),
+                "Variance": variance[i],
+                "Std Error": np.sqrt(variance[i] / len(replications)),
+                "Independent Variance": independent[i],
+                "Variance Reduction": independent[i] / variance[i] if variance[i] > 0 else np.inf,
+            })
+    return pd.DataFrame(rows)
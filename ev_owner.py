@@ -1,5 +1,4 @@
 import mesa
-import random
 from constants import (
     NETWORK_INFLUENCE_ANNUAL_INCREASE,
     MAX_NETWORK_INFLUENCE
@@ -12,84 +11,83 @@ from battery_manufacturer import BatteryManufacturer
 class EVOwner(mesa.Agent):
     """An agent representing an electric vehicle owner."""
     
-    def __init__(self, unique_id, model, battery_age=0):
+    def __init__(self, unique_id, model, battery_age=0, vehicle_lifespan=None):
         super().__init__(unique_id, model)
         self.battery_age = battery_age  # Age of battery in years
         self.has_recycled = False  # Track if the battery has been recycled
         self.battery_replaced = False  # Track if battery has been replaced this step
         self.network_influence = 0  # Influence from other EV owners about recycling
-    
-    def decide_to_recycle(self):
-        """Decide whether to recycle battery or discard it."""
-        base_probability = self.model.owner_recycling_probability
-        
-        # Increase probability based on network influence
-        adjusted_probability = min(0.95, base_probability + self.network_influence)
         
-        # Make decision
-        if random.random() < adjusted_probability:
-            return True  # Recycle
-        else:
-            return False  # Discard
+        # Vehicles start as old as their first battery and retire after
+        # vehicle_lifespan years (None: never)
+        self.vehicle_age = battery_age
+        self.vehicle_lifespan = vehicle_lifespan
+    
+    def reuse(self, unique_id, vehicle_lifespan=None):
+        """Reinitialise a retired owner's object as a new EV owner with a new battery."""
+        self.__init__(unique_id, self.model, 0, vehicle_lifespan)
     
     def step(self):
-        """Actions during each step (year)."""
-        # Reset battery replacement tracking for this step
-        self.battery_replaced = False
-        
-        # Age the battery by one year
-        self.battery_age += 1
-        
-        # Update network influence
-        self.update_network_influence()
-        
-        # Check if battery has reached end of life (80% capacity)
-        if self.battery_age >= self.model.battery_lifespan and not self.has_recycled:
-            # Decision to recycle or discard
-            if self.decide_to_recycle():
-                # Recycle the battery
-                self.recycle_battery()
-            else:
-                # Discard the battery (materials lost)
-                self.discard_battery()
-                
-            # Get a new battery either way
-            self.replace_battery()
+        """Actions during each step (year), see step_owner."""
+        if step_owner(self, self.model):
+            self.retire()
     
-    def recycle_battery(self):
-        """Send battery to recycling."""
-        # Find a recycling company - use the stored list for better performance
-        if self.model.recyclers:
-            recycler = self.random.choice(self.model.recyclers)
-            recycler.receive_battery()
-            
-        self.has_recycled = True
+    def retire(self):
+        """Leave the retired vehicle's object for this year's growth to reuse."""
+        self.model.retired_owners.append(self)
+
+def choose_company(model, companies):
+    """Pick one of `companies` at random for an owner of `model`.
     
-    def discard_battery(self):
-        """Discard the battery (materials are lost)."""
-        # No recycling occurs, materials are lost
-        self.has_recycled = True  # Mark as handled
+    With common random numbers this takes exactly one uniform from the
+    event stream (random.choice may take several), so choices stay aligned
+    across scenarios.
+    """
+    if model.common_random_numbers:
+        return companies[int(model.event_random.random() * len(companies))]
+    return model.random.choice(companies)
+
+def end_battery_life(owner, model):
+    """Recycle or discard an owner's battery at the end of its life."""
+    # event_random is the model's own stream unless it uses common random numbers
+    probability = min(0.95, model.owner_recycling_probability + owner.network_influence)
+    if model.event_random.random() < probability:
+        if model.recyclers:
+            choose_company(model, model.recyclers).receive_battery()
+    elif model.common_random_numbers and model.recyclers:
+        # Draw the unused recycler choice, keeping the event stream aligned
+        # with scenarios in which this battery is recycled
+        model.event_random.random()
+    owner.has_recycled = True
+
+def step_owner(owner, model):
+    """Advance one owner record by a year; returns True if its vehicle retired.
     
-    def replace_battery(self):
-        """Get a new battery."""
-        # Find a battery manufacturer - use the stored list for better performance
-        if self.model.manufacturers:
-            manufacturer = self.random.choice(self.model.manufacturers)
-            manufacturer.produce_battery()
-            
-        # Reset battery age
-        self.battery_age = 0
-        self.has_recycled = False
-        self.battery_replaced = True
+    Shared by EVOwner and the slotted backend, which hold the same fields.
+    Retiring vehicles recycle or discard their final battery without
+    replacing it; the caller removes them from the fleet.
+    """
+    owner.battery_replaced = False
+    owner.battery_age += 1
     
-    def update_network_influence(self):
-        """Update network influence based on neighbors."""
-        # This simulates word-of-mouth and awareness campaigns
-        # In a more complex model, this would use a network structure
-        
-        # For simplicity, we'll increase influence slightly each year
-        # representing growing awareness about recycling
-        self.network_influence += NETWORK_INFLUENCE_ANNUAL_INCREASE
-        
-        # Cap the influence
-        self.network_influence = min(MAX_NETWORK_INFLUENCE, self.network_influence) 
\ No newline at end of file
+    # Word-of-mouth and awareness campaigns raise influence a little each
+    # year, up to a cap
+    owner.network_influence = min(MAX_NETWORK_INFLUENCE,
+                                  owner.network_influence + NETWORK_INFLUENCE_ANNUAL_INCREASE)
+    
+    # Scrap the vehicle at the end of its life
+    if owner.vehicle_lifespan is not None:
+        owner.vehicle_age += 1
+        if owner.vehicle_age >= owner.vehicle_lifespan:
+            end_battery_life(owner, model)
+            return True
+    
+    # End of life (80% capacity): recycle or discard, then get a new battery either way
+    if owner.battery_age >= model.battery_lifespan and not owner.has_recycled:
+        end_battery_life(owner, model)
+        if model.manufacturers:
+            choose_company(model, model.manufacturers).produce_battery()
+        owner.battery_age = 0
+        owner.has_recycled = False
+        owner.battery_replaced = True
+    return False
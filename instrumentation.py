@@ -0,0 +1,131 @@
+import cProfile
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+import pandas as pd
+
+# Agent and population methods whose calls are counted when instrumentation is on
+INSTRUMENTED_METHODS = (
+    "step",
+    "retire",
+    "produce_battery",
+    "produce_batteries",
+    "receive_battery",
+    "receive_batteries",
+    "process_batteries",
+    "manufacture_batteries",
+    "add_owners",
+)
+
+def counting_method(method, key, counts):
+    """Wrap `method` so every call increments counts[key]."""
+    def wrapper(self, *args, **kwargs):
+        counts[key] += 1
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+class NullInstrumentation:
+    """Stand-in used when instrumentation is off; every hook is a no-op."""
+    
+    enabled = False
+    
+    def agent_class(self, cls):
+        return cls
+    
+    def phase(self, name):
+        return nullcontext()
+    
+    def begin_step(self):
+        pass
+    
+    def end_step(self, model):
+        pass
+    
+    def flush(self):
+        pass
+    
+    def get_dataframe(self):
+        return pd.DataFrame()
+
+class StepInstrumentation:
+    """Per-step phase timings, method call counts and population sizes for one model.
+    
+    Call counts come from per-model subclasses of the agent classes (see
+    agent_class), so models without instrumentation run the plain classes
+    and pay nothing for it.
+    """
+    
+    enabled = True
+    
+    def __init__(self, profile_path=None):
+        self.records = []
+        self.call_counts = Counter()
+        self.phase_times = {}
+        self.step_start = None
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_path else None
+    
+    def agent_class(self, cls):
+        """Subclass of `cls` that counts calls to its instrumented methods."""
+        namespace = {"__module__": cls.__module__, "__qualname__": cls.__qualname__}
+        namespace.update({
+            name: counting_method(getattr(cls, name), f"{cls.__name__}.{name}", self.call_counts)
+            for name in INSTRUMENTED_METHODS
+            if hasattr(cls, name)
+        })
+        return type(cls.__name__, (cls,), namespace)
+    
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as part of phase `name` of the current step."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0) + perf_counter() - start
+    
+    def begin_step(self):
+        self.phase_times = {}
+        self.call_counts.clear()
+        self.step_start = perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+    
+    def end_step(self, model):
+        """Record the finished step."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        
+        record = {
+            "Year": model.current_year - 1,
+            "Number of EVs": model.num_ev_owners,
+            "Scheduled Agents": model.schedule.get_agent_count(),
+            "Step Time (s)": perf_counter() - self.step_start,
+        }
+        for name, seconds in self.phase_times.items():
+            record[f"{name} Time (s)"] = seconds
+        for name, calls in sorted(self.call_counts.items()):
+            record[f"{name} Calls"] = calls
+        self.records.append(record)
+    
+    def flush(self):
+        """Export the profile of the steps so far to `profile_path`, if profiling.
+        
+        Callers stepping a model call this when they stop, whether or not
+        the model reached its end year.
+        """
+        if self.profiler is not None:
+            self.export_profile(self.profile_path)
+    
+    def export_profile(self, path):
+        """Write the cProfile data collected over all steps (readable with pstats)."""
+        self.profiler.dump_stats(path)
+    
+    def get_dataframe(self):
+        """One row per simulated year; call counts missing in a year are zero."""
+        table = pd.DataFrame(self.records)
+        calls = [column for column in table.columns if column.endswith(" Calls")]
+        table[calls] = table[calls].fillna(0).astype(int)
+        return table
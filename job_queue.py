@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import numpy as np
+from constants import SCENARIOS, JOB_SHARD_SIZE, JOB_LEASE_SECONDS, JOB_POLL_SECONDS
+
+def create_job(directory, scenarios=SCENARIOS, replications=1, seed=None,
+               shard_size=JOB_SHARD_SIZE, common_random_numbers=False):
+    """Write an ensemble job to `directory` and return its queue.
+    
+    The job holds everything run_ensemble takes; its (scenario, replication)
+    tasks are split, in ensemble order, into shards of `shard_size` tasks.
+    An unseeded job gets a fresh seed here, so every worker runs the same
+    tasks.
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy)
+    job = {
+        "scenarios": [[name, params] for name, params in scenarios],
+        "replications": replications,
+        "seed": seed,
+        "shard_size": shard_size,
+        "common_random_numbers": common_random_numbers,
+    }
+    os.makedirs(os.path.join(directory, "leases"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "results"), exist_ok=True)
+    path = os.path.join(directory, "job.json")
+    if os.path.exists(path):
+        raise ValueError(f"{directory} already holds a job")
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(temporary, path)
+    return WorkQueue(directory)
+
+class WorkQueue:
+    """File-system work queue over the shards of one ensemble job.
+    
+    Any number of workers, on any machines sharing `directory`, claim shards
+    by creating lease files and keep them alive by touching them. A lease
+    not renewed for `lease_seconds` has expired (its worker crashed or hung)
+    and the shard can be claimed again. Claims create a new lease generation
+    with O_CREAT | O_EXCL, so of several workers racing for a shard exactly
+    one wins. A shard is done once its results file exists. Shards are
+    deterministic, so a shard finished twice (by a worker thought dead and
+    its replacement) just writes the same results twice.
+    """
+    
+    def __init__(self, directory, lease_seconds=JOB_LEASE_SECONDS):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        with open(os.path.join(directory, "job.json")) as f:
+            self.job = json.load(f)
+        self._tasks = None
+    
+    def tasks(self, shard=None):
+        """The job's (name, replication, params, seed, cache) tasks, or one shard's."""
+        if self._tasks is None:
+            from ensemble import ensemble_tasks
+            job = self.job
+            self._tasks = ensemble_tasks([tuple(scenario) for scenario in job["scenarios"]],
+                                         job["replications"], job["seed"], None,
+                                         job["common_random_numbers"])
+        if shard is None:
+            return self._tasks
+        size = self.job["shard_size"]
+        return self._tasks[shard * size:(shard + 1) * size]
+    
+    @property
+    def shards(self):
+        return -(-len(self.tasks()) // self.job["shard_size"])
+    
+    def result_path(self, shard):
+        return os.path.join(self.directory, "results", f"shard-{shard:05d}.npz")
+    
+    def lease_path(self, shard, generation):
+        return os.path.join(self.directory, "leases", f"shard-{shard:05d}.{generation}")
+    
+    def done(self, shard):
+        return os.path.exists(self.result_path(shard))
+    
+    def scan(self):
+        """Done shards and each shard's current lease generation, from one listing per directory.
+        
+        Idle workers scan on every poll, so this stays linear in the number
+        of shards even on slow shared file systems.
+        """
+        done = set()
+        for name in os.listdir(os.path.join(self.directory, "results")):
+            if name.startswith("shard-") and name.endswith(".npz"):
+                done.add(int(name[len("shard-"):-len(".npz")]))
+        leases = {}
+        for name in os.listdir(os.path.join(self.directory, "leases")):
+            shard, generation = name[len("shard-"):].split(".")
+            shard, generation = int(shard), int(generation)
+            leases[shard] = max(generation, leases.get(shard, generation))
+        return done, leases
+    
+    def held(self, shard, generation):
+        """Whether a lease generation was renewed within the last `lease_seconds`."""
+        try:
+            age = time.time() - os.path.getmtime(self.lease_path(shard, generation))
+        except FileNotFoundError:
+            return False
+        return age < self.lease_seconds
+    
+    def claim(self, worker):
+        """Lease the first shard that is neither done nor leased; None if there is none."""
+        done, leases = self.scan()
+        for shard in range(self.shards):
+            if shard in done:
+                continue
+            generation = leases.get(shard)
+            if generation is not None and self.held(shard, generation):
+                continue
+            generation = generation + 1 if generation is not None else 0
+            path = self.lease_path(shard, generation)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue  # Another worker claimed it first
+            with os.fdopen(fd, "w") as f:
+                f.write(worker)
+            # The shard may have been finished between the scan and the claim
+            if self.done(shard):
+                continue
+            return shard, path
+        return None
+    
+    def complete(self, shard, frames):
+        """Store a shard's results, marking it done."""
+        from ensemble import merge_results
+        from results_cache import save_frame
+        save_frame(self.result_path(shard), merge_results(frames))
+    
+    def status(self):
+        """Numbers of done, leased (running) and pending shards."""
+        done, leases = self.scan()
+        counts = {"done": 0, "leased": 0, "pending": 0}
+        for shard in range(self.shards):
+            if shard in done:
+                counts["done"] += 1
+            elif shard in leases and self.held(shard, leases[shard]):
+                counts["leased"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+    
+    def merge(self):
+        """All runs of a finished job, as run_ensemble returns them."""
+        from results_cache import load_frame
+        
+        done, _ = self.scan()
+        missing = [shard for shard in range(self.shards) if shard not in done]
+        if missing:
+            raise ValueError(f"{len(missing)} of {self.shards} shards are not done yet")
+        frames = []
+        for shard in range(self.shards):
+            results = load_frame(self.result_path(shard))
+            for _, frame in results.groupby(["Scenario", "Replication"], sort=False):
+                frames.append(frame.reset_index(drop=True))
+        return frames
+
+class Heartbeat:
+    """Background thread renewing a lease until the shard is finished."""
+    
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+def work(directory, worker=None, cache=None, lease_seconds=JOB_LEASE_SECONDS,
+         poll_seconds=JOB_POLL_SECONDS, verbose=True):
+    """Claim and run shards of the job in `directory` until all are done.
+    
+    While other workers hold the remaining shards this worker polls, so it
+    takes over the shards of any that stop renewing their leases. Returns
+    the number of shards this worker completed.
+    """
+    from ensemble import run_replication
+    
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(directory, lease_seconds)
+    completed = 0
+    while True:
+        claim = queue.claim(worker)
+        if claim is None:
+            status = queue.status()
+            if status["done"] == queue.shards:
+                return completed
+            time.sleep(poll_seconds)
+            continue
+        
+        shard, lease = claim
+        with Heartbeat(lease, lease_seconds / 3):
+            frames = [run_replication((*task[:4], cache)) for task in queue.tasks(shard)]
+            queue.complete(shard, frames)
+        completed += 1
+        if verbose:
+            print(f"{worker}: finished shard {shard + 1} of {queue.shards}")
+
+def run_workers(directory, processes, cache_dir=None, lease_seconds=JOB_LEASE_SECONDS,
+                poll_seconds=JOB_POLL_SECONDS):
+    """Run `processes` local worker processes on one job, e.g. to test a shared directory."""
+    import multiprocessing
+    
+    workers = [
+        multiprocessing.Process(target=work_process, args=(directory, cache_dir, lease_seconds, poll_seconds))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    return [process.exitcode for process in workers]
+
+def work_process(directory, cache_dir, lease_seconds, poll_seconds):
+    """Entry point of a run_workers process."""
+    cache = None
+    if cache_dir:
+        from results_cache import ResultCache
+        cache = ResultCache(cache_dir)
+    work(directory, cache=cache, lease_seconds=lease_seconds, poll_seconds=poll_seconds)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create, work on and merge sharded ensemble jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    create = commands.add_parser("create", help="write a job to a shared directory")
+    create.add_argument("directory")
+    create.add_argument("--scenarios", help="JSON file of scenarios (default: the built-in SCENARIOS)")
+    create.add_argument("--params", help="JSON file of parameters applied to every scenario")
+    create.add_argument("--replications", type=int, default=1, help="runs per scenario")
+    create.add_argument("--seed", type=int, help="base seed (default: a fresh one)")
+    create.add_argument("--shard-size", type=int, default=JOB_SHARD_SIZE, help="runs per shard")
+    create.add_argument("--common-random-numbers", action="store_true",
+                        help="share random streams across scenarios")
+    
+    worker = commands.add_parser("work", help="run shards until the job is done")
+    worker.add_argument("directory")
+    worker.add_argument("--processes", type=int, default=1, help="local worker processes")
+    worker.add_argument("--cache-dir", help="result cache directory (default: no cache)")
+    worker.add_argument("--lease-seconds", type=float, default=JOB_LEASE_SECONDS)
+    worker.add_argument("--poll-seconds", type=float, default=JOB_POLL_SECONDS)
+    
+    status = commands.add_parser("status", help="count done, leased and pending shards")
+    status.add_argument("directory")
+    
+    merge = commands.add_parser("merge", help="assemble the results of a finished job")
+    merge.add_argument("directory")
+    merge.add_argument("--output", help="write all results to this CSV file")
+    merge.add_argument("--figure", help="figure path for the analysis (default: no figure)")
+    args = parser.parse_args()
+    
+    if args.command == "create":
+        from run import load_scenarios
+        base_params = {}
+        if args.params:
+            with open(args.params) as f:
+                base_params = json.load(f)
+        scenarios = load_scenarios(args.scenarios) if args.scenarios else SCENARIOS
+        scenarios = [(name, {**base_params, **params}) for name, params in scenarios]
+        queue = create_job(args.directory, scenarios, args.replications, args.seed,
+                           args.shard_size, args.common_random_numbers)
+        print(f"Created a job of {len(queue.tasks())} runs in {queue.shards} shards in {args.directory}")
+    elif args.command == "work" and args.processes == 1:
+        work_process(args.directory, args.cache_dir, args.lease_seconds, args.poll_seconds)
+    elif args.command == "work":
+        run_workers(args.directory, args.processes, args.cache_dir, args.lease_seconds, args.poll_seconds)
+    elif args.command == "status":
+        queue = WorkQueue(args.directory)
+        print(", ".join(f"{count} {state}" for state, count in queue.status().items()),
+              f"of {queue.shards} shards")
+    else:
+        from ensemble import merge_results, paired_differences, scenario_results
+        from run import analyze_results
+        
+        queue = WorkQueue(args.directory)
+        frames = queue.merge()
+        if args.output:
+            merge_results(frames).to_csv(args.output, index=False)
+            print(f"Saved {len(frames)} runs to {args.output}")
+        
+        results = scenario_results(frames)
+        if queue.job["common_random_numbers"] and "baseline" in results and len(results) > 1:
+            print(paired_differences(frames, "baseline").to_string(index=False))
+        if "baseline" in results and "no_recycling" in results:
+            analyze_results(results, figure=args.figure)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+class MaterialLedger:
+    """Model-wide ledger of battery materials, one vector entry per material.
+    
+    Materials come from a table of kg per battery, so adding e.g. nickel or
+    manganese needs no new attributes. Recycled material goes into a shared
+    pool that new batteries draw on before virgin material; batch operations
+    give the same totals as handling batteries one at a time. Every closed
+    year is appended to an audit trail, unless `keep_audit` is off.
+    """
+    
+    def __init__(self, materials_per_battery, keep_audit=True):
+        self.materials = list(materials_per_battery)
+        self.index = {material: i for i, material in enumerate(self.materials)}
+        self.per_battery = np.array(list(materials_per_battery.values()), dtype=np.float64)
+        
+        # Current recycled pool and cumulative totals
+        self.pool = np.zeros(len(self.materials))
+        self.total_recycled = np.zeros(len(self.materials))
+        self.total_used_from_recycled = np.zeros(len(self.materials))
+        
+        # Flows for the current year
+        self.annual_recovered = np.zeros(len(self.materials))
+        self.annual_used_from_recycled = np.zeros(len(self.materials))
+        self.new_required = np.zeros(len(self.materials))
+        self.annual_batteries_recycled = 0
+        self.annual_batteries_produced = 0
+        
+        self.audit = [] if keep_audit else None
+        
+        # Optional cross-border trade: exchange(pool) returns the net imports
+        # of recycled material. It is called once a year, after the year's
+        # recycling and before the first new battery draws on the pool.
+        self.exchange = None
+        self.exchanged = False
+    
+    def receive_batteries(self, count, efficiency):
+        """Recover materials from `count` recycled batteries; returns kg recovered per material."""
+        recovered = self.per_battery * (efficiency * count)
+        self.pool += recovered
+        self.total_recycled += recovered
+        self.annual_recovered += recovered
+        self.annual_batteries_recycled += count
+        return recovered
+    
+    def produce_batteries(self, count):
+        """Supply `count` new batteries, recycled material first; returns kg recycled used."""
+        if not self.exchanged:
+            self.exchange_pool()
+        needed = self.per_battery * count
+        from_recycled = np.minimum(self.pool, needed)
+        self.pool -= from_recycled
+        self.total_used_from_recycled += from_recycled
+        self.annual_used_from_recycled += from_recycled
+        self.new_required += needed - from_recycled
+        self.annual_batteries_produced += count
+        return from_recycled
+    
+    def begin_year(self):
+        """Reset the annual flows; pools and cumulative totals carry over."""
+        self.annual_recovered[:] = 0
+        self.annual_used_from_recycled[:] = 0
+        self.new_required[:] = 0
+        self.annual_batteries_recycled = 0
+        self.annual_batteries_produced = 0
+        self.exchanged = False
+    
+    def exchange_pool(self):
+        """Trade recycled material once this year, if the ledger has an exchange."""
+        self.exchanged = True
+        if self.exchange is not None:
+            self.pool += self.exchange(self.pool)
+    
+    def close_year(self, year):
+        """Append this year's flows and closing pool balances to the audit trail."""
+        # Years without new batteries still trade
+        if not self.exchanged:
+            self.exchange_pool()
+        if self.audit is None:
+            return
+        record = {
+            "Year": year,
+            "Batteries Recycled": self.annual_batteries_recycled,
+            "Batteries Produced": self.annual_batteries_produced,
+        }
+        for i, material in enumerate(self.materials):
+            name = material.capitalize()
+            record[f"{name} Recovered"] = self.annual_recovered[i]
+            record[f"{name} Used From Recycled"] = self.annual_used_from_recycled[i]
+            record[f"New {name} Required"] = self.new_required[i]
+            record[f"{name} Pool"] = self.pool[i]
+        self.audit.append(record)
+    
+    def get_audit_dataframe(self):
+        """The annual audit trail, one row per simulated year."""
+        return pd.DataFrame(self.audit or [])
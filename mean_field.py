@@ -0,0 +1,155 @@
+import argparse
+import inspect
+import numpy as np
+import pandas as pd
+from constants import MAX_RECYCLING_EFFICIENCY
+
+# Model features the difference equations do not cover; these must keep their defaults
+UNSUPPORTED_PARAMETERS = (
+    "social_network",
+    "lifespan_distribution",
+    "vehicle_lifespan_years",
+    "recycler_capacity",
+    "manufacturer_capacity",
+)
+
+# Columns compared against ABM ensembles by validate()
+VALIDATION_COLUMNS = [
+    "Recycled Lithium",
+    "Recycled Cobalt",
+    "New Lithium Required",
+    "New Cobalt Required",
+]
+
+def model_parameters(params):
+    """All EVBatteryModel constructor arguments, with defaults filled in."""
+    from model import EVBatteryModel
+    
+    signature = inspect.signature(EVBatteryModel.__init__)
+    bound = signature.bind(None, **params)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments["self"]
+    
+    for name in UNSUPPORTED_PARAMETERS:
+        if arguments[name] != signature.parameters[name].default:
+            raise ValueError(f"The mean-field solver does not support {name!r}")
+    return arguments
+
+def solve(params=None):
+    """Expected trajectory of EVBatteryModel(**params), without simulating agents.
+    
+    Tracks the expected number of vehicles per (battery age, influence level)
+    cell, as the cohort backend does, but splits end-of-life batteries into
+    recycled and discarded by their expected shares instead of binomial
+    draws. Takes the model's parameters (simulation-only ones such as the
+    owner backend and seed are ignored) and returns the DataCollector's
+    columns, one row for the initial state and one per simulated year.
+    """
+    from cohort_owners import age_cohorts, influence_levels
+    from material_ledger import MaterialLedger
+    from model import growth_rate
+    
+    p = model_parameters(params or {})
+    lifespan = p["battery_lifespan_years"]
+    influence = influence_levels()
+    recycle_probability = np.clip(np.minimum(0.95, p["owner_recycling_probability"] + influence), 0, 1)
+    ledger = MaterialLedger({
+        "lithium": p["lithium_per_battery"],
+        "cobalt": p["cobalt_per_battery"],
+        **p["additional_materials"],
+    }, keep_audit=False)
+    lithium, cobalt = ledger.index["lithium"], ledger.index["cobalt"]
+    
+    # Initial battery ages are uniform over 0..lifespan, with no influence yet
+    num_ev_owners = p["initial_ev_owners"]
+    counts = np.zeros((lifespan + 2, len(influence)))
+    counts[:lifespan + 1, 0] = num_ev_owners / (lifespan + 1)
+    efficiency = p["recycling_efficiency_start"]
+    year = p["start_year"]
+    
+    rows = [(year, num_ev_owners, efficiency, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)]
+    while year <= p["end_year"]:
+        ledger.begin_year()
+        
+        counts = age_cohorts(counts)
+        
+        # Expected recycled share of the end-of-life batteries, all of them replaced
+        end_of_life = counts[lifespan:].sum(axis=0)
+        counts[lifespan:] = 0
+        counts[0] += end_of_life
+        ledger.receive_batteries(end_of_life @ recycle_probability, efficiency)
+        ledger.produce_batteries(end_of_life.sum())
+        
+        efficiency = min(MAX_RECYCLING_EFFICIENCY, efficiency * (1 + p["recycling_efficiency_growth"]))
+        
+        # Market growth is deterministic in the model too
+        new_evs = int(num_ev_owners * growth_rate(p["ev_growth_rates"], year))
+        counts[0, 0] += new_evs
+        num_ev_owners += new_evs
+        year += 1
+        
+        rows.append((
+            year, num_ev_owners, efficiency,
+            ledger.new_required[lithium], ledger.new_required[cobalt],
+            ledger.total_recycled[lithium], ledger.total_recycled[cobalt],
+            ledger.new_required[lithium], ledger.new_required[cobalt],
+        ))
+    
+    return pd.DataFrame(rows, columns=[
+        "Year", "Number of EVs", "Recycling Efficiency",
+        "Total Lithium Demand", "Total Cobalt Demand",
+        "Recycled Lithium", "Recycled Cobalt",
+        "New Lithium Required", "New Cobalt Required",
+    ])
+
+def validate(params=None, replications=20, seed=0, workers=None, columns=VALIDATION_COLUMNS):
+    """Compare the mean-field trajectory with an ensemble of ABM runs.
+    
+    Returns one row per year and column with the mean-field value, the
+    ensemble mean and its standard error, and the z-score of the difference.
+    """
+    from ensemble import run_ensemble
+    
+    params = params or {}
+    expected = solve(params)
+    frames = run_ensemble([("abm", params)], replications, seed, workers)
+    runs = np.stack([frame[columns].to_numpy(dtype=np.float64) for frame in frames])
+    mean = runs.mean(axis=0)
+    std_error = runs.std(axis=0, ddof=1) / np.sqrt(replications) if replications > 1 else np.zeros_like(mean)
+    
+    rows = []
+    for c, column in enumerate(columns):
+        for t, year in enumerate(expected["Year"]):
+            difference = expected[column].iloc[t] - mean[t, c]
+            rows.append({
+                "Year": year,
+                "Column": column,
+                "Mean Field": expected[column].iloc[t],
+                "ABM Mean": mean[t, c],
+                "ABM Std Error": std_error[t, c],
+                "Difference": difference,
+                "Z": difference / std_error[t, c] if std_error[t, c] > 0 else 0.0,
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the mean-field solver against ABM ensembles.")
+    parser.add_argument("--replications", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--backend", default="vectorized", help="owner backend of the ABM runs")
+    parser.add_argument("--end-year", type=int)
+    args = parser.parse_args()
+    
+    params = {"owner_backend": args.backend}
+    if args.end_year is not None:
+        params["end_year"] = args.end_year
+    comparison = validate(params, args.replications, args.seed, args.workers)
+    summary = comparison.groupby("Column").agg(
+        max_abs_z=("Z", lambda z: z.abs().max()),
+        mean_abs_z=("Z", lambda z: z.abs().mean()),
+        final_mean_field=("Mean Field", "last"),
+        final_abm_mean=("ABM Mean", "last"),
+    )
+    print(summary.to_string())
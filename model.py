@@ -1,22 +1,55 @@
+import random
 import mesa
 import numpy as np
-import random
 from constants import (
     INITIAL_EV_OWNERS,
     INITIAL_BATTERY_MANUFACTURERS,
     INITIAL_RECYCLING_COMPANIES,
+    RECYCLER_CAPACITY,
+    MANUFACTURER_CAPACITY,
+    FACILITY_COST_SPREAD,
     RECYCLING_EFFICIENCY_START,
     RECYCLING_EFFICIENCY_GROWTH,
     OWNER_RECYCLING_PROBABILITY,
     EV_GROWTH_RATES,
     LITHIUM_PER_BATTERY,
     COBALT_PER_BATTERY,
+    ADDITIONAL_MATERIALS_PER_BATTERY,
     BATTERY_LIFESPAN_YEARS,
+    LIFESPAN_DISTRIBUTION,
+    LIFESPAN_SPREAD,
+    VEHICLE_LIFESPAN_YEARS,
+    VEHICLE_LIFESPAN_DISTRIBUTION,
+    VEHICLE_LIFESPAN_SPREAD,
     START_YEAR,
     END_YEAR,
-    MAX_RECYCLING_EFFICIENCY
+    MAX_RECYCLING_EFFICIENCY,
+    OWNER_BACKEND,
+    DATA_COLLECTOR,
+    SOCIAL_NETWORK,
+    NETWORK_MEAN_DEGREE,
+    AGENT_BUDGET,
+    COMMON_RANDOM_NUMBERS
 )
 
+# Supported owner population representations
+OWNER_BACKENDS = ("agents", "slotted", "vectorized", "cohort", "calendar")
+
+def growth_rate(ev_growth_rates, year):
+    """EV market growth rate for `year` from a table of growth rates by period."""
+    if year <= 2030:
+        return ev_growth_rates["2024-2030"]
+    elif year <= 2035:
+        return ev_growth_rates["2031-2035"]
+    else:
+        return ev_growth_rates["2036-2050"]
+
+def total_lithium_demand(model):
+    return model.calculate_lithium_demand()
+
+def total_cobalt_demand(model):
+    return model.calculate_cobalt_demand()
+
 class EVBatteryModel(mesa.Model):
     """Model for simulating EV battery recycling and its effect on lithium and cobalt demand."""
     
@@ -25,20 +58,43 @@ class EVBatteryModel(mesa.Model):
         initial_ev_owners=INITIAL_EV_OWNERS,
         initial_battery_manufacturers=INITIAL_BATTERY_MANUFACTURERS,
         initial_recycling_companies=INITIAL_RECYCLING_COMPANIES,
+        recycler_capacity=RECYCLER_CAPACITY,
+        manufacturer_capacity=MANUFACTURER_CAPACITY,
+        facility_cost_spread=FACILITY_COST_SPREAD,
         recycling_efficiency_start=RECYCLING_EFFICIENCY_START,
         recycling_efficiency_growth=RECYCLING_EFFICIENCY_GROWTH,
         owner_recycling_probability=OWNER_RECYCLING_PROBABILITY,
         ev_growth_rates=EV_GROWTH_RATES,
         lithium_per_battery=LITHIUM_PER_BATTERY,
         cobalt_per_battery=COBALT_PER_BATTERY,
+        additional_materials=ADDITIONAL_MATERIALS_PER_BATTERY,
         battery_lifespan_years=BATTERY_LIFESPAN_YEARS,
+        lifespan_distribution=LIFESPAN_DISTRIBUTION,
+        lifespan_spread=LIFESPAN_SPREAD,
+        vehicle_lifespan_years=VEHICLE_LIFESPAN_YEARS,
+        vehicle_lifespan_distribution=VEHICLE_LIFESPAN_DISTRIBUTION,
+        vehicle_lifespan_spread=VEHICLE_LIFESPAN_SPREAD,
         start_year=START_YEAR,
-        end_year=END_YEAR
+        end_year=END_YEAR,
+        owner_backend=OWNER_BACKEND,
+        social_network=SOCIAL_NETWORK,
+        network_mean_degree=NETWORK_MEAN_DEGREE,
+        agent_budget=AGENT_BUDGET,
+        common_random_numbers=COMMON_RANDOM_NUMBERS,
+        data_collector=DATA_COLLECTOR,
+        collector_path=None,
+        instrument=False,
+        profile_path=None,
+        seed=None
     ):
+        # Mesa seeds self.random from the `seed` keyword before __init__ runs
         super().__init__()
         self.num_ev_owners = initial_ev_owners
         self.num_battery_manufacturers = initial_battery_manufacturers
         self.num_recycling_companies = initial_recycling_companies
+        self.recycler_capacity = recycler_capacity
+        self.manufacturer_capacity = manufacturer_capacity
+        self.facility_cost_spread = facility_cost_spread
         self.recycling_efficiency = recycling_efficiency_start
         self.recycling_efficiency_growth = recycling_efficiency_growth
         self.owner_recycling_probability = owner_recycling_probability
@@ -47,6 +103,75 @@ class EVBatteryModel(mesa.Model):
         self.cobalt_per_battery = cobalt_per_battery
         self.battery_lifespan = battery_lifespan_years
         
+        # Owner representation: "agents" (one EVOwner per vehicle),
+        # "slotted" (compact per-vehicle records outside the scheduler),
+        # "vectorized" (NumPy arrays stepped in bulk), "cohort"
+        # (vehicle counts per battery age and influence level) or
+        # "calendar" (owners visited only when their battery reaches end of life)
+        if owner_backend not in OWNER_BACKENDS:
+            raise ValueError(f"Unknown owner backend: {owner_backend!r}")
+        self.owner_backend = owner_backend
+        self.owner_population = None
+        
+        # Optional per-battery lifespans drawn around battery_lifespan_years
+        if lifespan_distribution is not None and owner_backend != "calendar":
+            raise ValueError("A lifespan distribution requires the calendar owner backend")
+        self.lifespan_distribution = lifespan_distribution
+        self.lifespan_spread = lifespan_spread
+        
+        # Optional vehicle retirement, with retired owner slots reused for new EVs
+        if vehicle_lifespan_years is not None:
+            if owner_backend not in ("agents", "slotted", "vectorized"):
+                raise ValueError(f"Vehicle retirement is not supported by the {owner_backend} owner backend")
+            if social_network is not None:
+                raise ValueError("Vehicle retirement cannot be combined with a social network")
+        self.vehicle_lifespan = vehicle_lifespan_years
+        self.vehicle_lifespan_distribution = vehicle_lifespan_distribution
+        self.vehicle_lifespan_spread = vehicle_lifespan_spread
+        self.retired_owners = []  # Retired EVOwner objects awaiting reuse
+        
+        # Optional peer-effect network between owners
+        if social_network is not None and owner_backend != "vectorized":
+            raise ValueError("A social network requires the vectorized owner backend")
+        self.social_network = social_network
+        self.network_mean_degree = network_mean_degree
+        
+        # Optional cap on owner entries, using weighted super-individuals
+        if agent_budget is not None:
+            if owner_backend != "vectorized":
+                raise ValueError("An agent budget requires the vectorized owner backend")
+            if social_network is not None:
+                raise ValueError("An agent budget cannot be combined with a social network")
+            if agent_budget < 1:
+                raise ValueError("The agent budget must be at least 1")
+        self.agent_budget = agent_budget
+        
+        # NumPy generator for bulk draws, derived from the model's seeded stream
+        self.np_random = np.random.default_rng(self.random.getrandbits(64))
+        
+        # Common random numbers: owner decisions and company choices take a
+        # fixed number of uniforms per end-of-life event from streams of their
+        # own, so runs of different scenarios with the same seed give the
+        # same owner's event the same uniform. Bulk backends dispatch
+        # batteries from a separate generator for the same reason.
+        if common_random_numbers and owner_backend == "cohort":
+            raise ValueError("Common random numbers are not supported by the cohort owner backend")
+        self.common_random_numbers = common_random_numbers
+        if common_random_numbers:
+            self.event_random = random.Random(self.random.getrandbits(64))
+            self.dispatch_rng = np.random.default_rng(self.random.getrandbits(64))
+        else:
+            self.event_random = self.random
+            self.dispatch_rng = None  # Backends dispatch from their own generator
+        
+        # Optional per-step timing and call-count instrumentation
+        if instrument or profile_path:
+            from instrumentation import StepInstrumentation
+            self.instrumentation = StepInstrumentation(profile_path)
+        else:
+            from instrumentation import NullInstrumentation
+            self.instrumentation = NullInstrumentation()
+        
         # Time tracking
         self.start_year = start_year
         self.end_year = end_year
@@ -59,32 +184,51 @@ class EVBatteryModel(mesa.Model):
         # Track next unique ID
         self.next_id = 0
         
-        # Track materials - separate current pool from cumulative totals
-        self.recycled_lithium = 0  # Current available pool
-        self.recycled_cobalt = 0   # Current available pool
-        self.new_lithium_required = 0
-        self.new_cobalt_required = 0
-        
-        # Track cumulative totals
-        self.total_lithium_recycled = 0  # Total ever recycled
-        self.total_cobalt_recycled = 0   # Total ever recycled
-        self.total_lithium_used_from_recycled = 0  # Total recycled lithium used
-        self.total_cobalt_used_from_recycled = 0   # Total recycled cobalt used
-        
-        # Data collection
-        self.datacollector = mesa.DataCollector(
-            model_reporters={
-                "Year": lambda m: m.current_year,
-                "Number of EVs": lambda m: m.num_ev_owners,
-                "Recycling Efficiency": lambda m: m.recycling_efficiency,
-                "Total Lithium Demand": lambda m: m.calculate_lithium_demand(),
-                "Total Cobalt Demand": lambda m: m.calculate_cobalt_demand(),
-                "Recycled Lithium": lambda m: m.total_lithium_recycled,  # Changed to show cumulative
-                "Recycled Cobalt": lambda m: m.total_cobalt_recycled,    # Changed to show cumulative
-                "New Lithium Required": lambda m: m.new_lithium_required,
-                "New Cobalt Required": lambda m: m.new_cobalt_required,
-            }
-        )
+        # Track materials - the ledger keeps the current recycled pool, annual
+        # demand and cumulative totals for every material in the table
+        from material_ledger import MaterialLedger
+        self.ledger = MaterialLedger({
+            "lithium": lithium_per_battery,
+            "cobalt": cobalt_per_battery,
+            **additional_materials,
+        }, keep_audit=data_collector != "none")
+        
+        # Data collection (attribute names avoid a lambda call per reporter, and
+        # module-level functions keep the model picklable for checkpoints)
+        model_reporters = {
+            "Year": "current_year",
+            "Number of EVs": "num_ev_owners",
+            "Recycling Efficiency": "recycling_efficiency",
+            "Total Lithium Demand": total_lithium_demand,
+            "Total Cobalt Demand": total_cobalt_demand,
+            "Recycled Lithium": "total_lithium_recycled",  # Changed to show cumulative
+            "Recycled Cobalt": "total_cobalt_recycled",   # Changed to show cumulative
+            "New Lithium Required": "new_lithium_required",
+            "New Cobalt Required": "new_cobalt_required",
+        }
+        
+        # Batteries and orders queued for capacity, when companies have limits
+        if recycler_capacity is not None:
+            model_reporters["Recycling Backlog"] = "recycling_backlog"
+        if manufacturer_capacity is not None:
+            model_reporters["Production Backlog"] = "production_backlog"
+        
+        if data_collector == "columnar":
+            from columnar_collector import ColumnarDataCollector
+            # One row for the initial state plus one per simulated year
+            self.datacollector = ColumnarDataCollector(
+                model_reporters,
+                rows=end_year - start_year + 2,
+                dtypes={"Year": np.int64, "Number of EVs": np.int64,
+                        "Recycling Backlog": np.int64, "Production Backlog": np.int64},
+                path=collector_path
+            )
+        elif data_collector == "mesa":
+            self.datacollector = mesa.DataCollector(model_reporters=model_reporters)
+        elif data_collector == "none":
+            self.datacollector = None  # Results are only read as the model runs
+        else:
+            raise ValueError(f"Unknown data collector: {data_collector!r}")
         
         # Store references to agent types for faster lookup
         self.ev_owners = []
@@ -95,7 +239,8 @@ class EVBatteryModel(mesa.Model):
         self.create_agents()
         
         # Initial data collection
-        self.datacollector.collect(self)
+        if self.datacollector is not None:
+            self.datacollector.collect(self)
     
     def get_next_id(self):
         """Get the next unique ID and increment counter."""
@@ -109,69 +254,209 @@ class EVBatteryModel(mesa.Model):
         from battery_manufacturer import BatteryManufacturer
         from recycling_company import RecyclingCompany
         
+        # Instrumented models count method calls through wrapped subclasses
+        EVOwner = self.owner_class = self.instrumentation.agent_class(EVOwner)
+        BatteryManufacturer = self.instrumentation.agent_class(BatteryManufacturer)
+        RecyclingCompany = self.instrumentation.agent_class(RecyclingCompany)
+        
         # Create EV owners
-        for i in range(self.num_ev_owners):
-            battery_age = random.randint(0, self.battery_lifespan)  # Random initial battery age
-            ev_owner = EVOwner(self.get_next_id(), self, battery_age)
-            self.schedule.add(ev_owner)
-            self.ev_owners.append(ev_owner)
+        if self.owner_backend != "agents":
+            battery_ages = self.np_random.integers(0, self.battery_lifespan, size=self.num_ev_owners, endpoint=True)
+            self.owner_population = self.create_owner_population(battery_ages, self.np_random)
+        else:
+            vehicle_lifespans = self.draw_vehicle_lifespans(self.num_ev_owners)
+            for i in range(self.num_ev_owners):
+                battery_age = self.random.randint(0, self.battery_lifespan)  # Random initial battery age
+                ev_owner = EVOwner(self.get_next_id(), self, battery_age, self.vehicle_lifespan_at(vehicle_lifespans, i))
+                self.schedule.add(ev_owner)
+                self.ev_owners.append(ev_owner)
             
         # Create battery manufacturers
-        for i in range(self.num_battery_manufacturers):
-            manufacturer = BatteryManufacturer(self.get_next_id(), self)
+        for capacity, cost in self.facility_settings(self.manufacturer_capacity, self.num_battery_manufacturers):
+            manufacturer = BatteryManufacturer(self.get_next_id(), self, capacity, cost)
             self.schedule.add(manufacturer)
             self.manufacturers.append(manufacturer)
             
         # Create recycling companies
-        for i in range(self.num_recycling_companies):
-            recycler = RecyclingCompany(self.get_next_id(), self)
+        for capacity, cost in self.facility_settings(self.recycler_capacity, self.num_recycling_companies):
+            recycler = RecyclingCompany(self.get_next_id(), self, capacity, cost)
             self.schedule.add(recycler)
             self.recyclers.append(recycler)
+        
+        # Capacity-limited companies are fed through routers that keep the backlog
+        from capacity_router import CapacityRouter
+        self.recycler_router = None
+        if self.recycler_capacity is not None:
+            self.recycler_router = CapacityRouter(self.recyclers, "process_batteries")
+        self.manufacturer_router = None
+        if self.manufacturer_capacity is not None:
+            self.manufacturer_router = CapacityRouter(self.manufacturers, "manufacture_batteries")
+    
+    def facility_settings(self, capacity, count):
+        """(capacity, cost) for each of `count` companies.
+        
+        `capacity` is None (unlimited), one capacity for every company or a
+        sequence with one per company. Costs are only drawn for capacity-limited
+        companies, since routing by cost needs capacities.
+        """
+        if capacity is None:
+            return [(None, 1.0)] * count
+        capacities = list(capacity) if np.ndim(capacity) else [capacity] * count
+        if len(capacities) != count:
+            raise ValueError(f"Expected {count} facility capacities, got {len(capacities)}")
+        costs = np.ones(count)
+        if self.facility_cost_spread:
+            spread = self.facility_cost_spread
+            costs += self.np_random.uniform(-spread, spread, size=count)
+        return [(int(capacity), float(cost)) for capacity, cost in zip(capacities, costs)]
+    
+    def create_owner_population(self, battery_ages, rng):
+        """Create the bulk owner population for non-agent backends."""
+        if self.owner_backend == "slotted":
+            # Slotted owners draw from self.random one at a time, like EVOwner
+            from slotted_owners import SlottedEVOwners
+            return self.instrumentation.agent_class(SlottedEVOwners)(self, battery_ages)
+        elif self.owner_backend == "cohort":
+            from cohort_owners import CohortEVOwners
+            return self.instrumentation.agent_class(CohortEVOwners)(self, battery_ages, rng)
+        elif self.owner_backend == "calendar":
+            from calendar_owners import CalendarEVOwners
+            return self.instrumentation.agent_class(CalendarEVOwners)(
+                self, battery_ages, rng, self.lifespan_distribution, self.lifespan_spread,
+                self.dispatch_rng)
+        else:
+            from vectorized_owners import VectorizedEVOwners
+            network = None
+            if self.social_network is not None:
+                from social_network import SocialNetwork
+                network = SocialNetwork(self.social_network, len(battery_ages), self.network_mean_degree, rng)
+            return self.instrumentation.agent_class(VectorizedEVOwners)(
+                self, battery_ages, rng, network, self.agent_budget, self.dispatch_rng)
+    
+    def draw_vehicle_lifespans(self, count):
+        """Lifetimes for `count` new vehicles, or None without vehicle retirement."""
+        if self.vehicle_lifespan is None:
+            return None
+        from calendar_owners import draw_lifespans
+        return draw_lifespans(self.np_random, count, self.vehicle_lifespan,
+                              self.vehicle_lifespan_distribution, self.vehicle_lifespan_spread)
+    
+    @staticmethod
+    def vehicle_lifespan_at(vehicle_lifespans, i):
+        """The i-th drawn vehicle lifetime as an int, or None without retirement."""
+        return None if vehicle_lifespans is None else int(vehicle_lifespans[i])
     
     def get_current_growth_rate(self):
         """Return the appropriate growth rate based on current year."""
-        if self.current_year <= 2030:
-            return self.ev_growth_rates["2024-2030"]
-        elif self.current_year <= 2035:
-            return self.ev_growth_rates["2031-2035"]
-        else:
-            return self.ev_growth_rates["2036-2050"]
+        return growth_rate(self.ev_growth_rates, self.current_year)
     
     def step(self):
         """Advance the model by one step (one year)."""
+        instrumentation = self.instrumentation
+        instrumentation.begin_step()
+        
         # Reset only demand variables for this step, not accumulated recycled materials
-        self.new_lithium_required = 0
-        self.new_cobalt_required = 0
+        self.ledger.begin_year()
         
         # Step all agents
-        self.schedule.step()
+        with instrumentation.phase("Schedule"):
+            self.schedule.step()
+        if self.owner_population is not None:
+            with instrumentation.phase("Owner Population"):
+                self.owner_population.step()
+        with instrumentation.phase("Settle"):
+            self.settle_companies()
         
         # Update recycling efficiency with compounding growth
         self.recycling_efficiency = min(MAX_RECYCLING_EFFICIENCY, 
                                        self.recycling_efficiency * (1 + self.recycling_efficiency_growth))
         
+        # Retired vehicles leave the fleet before it grows
+        if self.vehicle_lifespan is not None:
+            self.num_ev_owners -= self.release_retired_owners()
+        
         # Grow EV market
         growth_rate = self.get_current_growth_rate()
         new_evs = int(self.num_ev_owners * growth_rate)
         
         # Add new EV owners more efficiently
-        from ev_owner import EVOwner
-        for i in range(new_evs):
-            ev_owner = EVOwner(self.get_next_id(), self, 0)  # New cars with new batteries
-            self.schedule.add(ev_owner)
-            self.ev_owners.append(ev_owner)
+        with instrumentation.phase("Growth"):
+            self.add_ev_owners(new_evs)
         
         self.num_ev_owners += new_evs
+        self.retired_owners.clear()  # Unused retired objects are not kept past the year
         
-        # Advance year
+        # Record this year's material flows, then advance year
+        self.ledger.close_year(self.current_year)
         self.current_year += 1
         
         # Collect data
-        self.datacollector.collect(self)
+        with instrumentation.phase("Collect"):
+            if self.datacollector is not None:
+                self.datacollector.collect(self)
         
         # Check if simulation should end
         if self.current_year > self.end_year:
             self.running = False
+        
+        instrumentation.end_step(self)
+    
+    def settle_companies(self):
+        """Process batteries handed to companies one at a time during the step.
+        
+        Recycling everything before producing uses the same amount of recycled
+        material in total as handling batteries one at a time, as long as
+        every recycled battery is replaced in the same year: each returns less
+        material than its replacement needs, so nothing is left in the pool
+        that an earlier production could have used. Batteries recycled without
+        a replacement (from retiring vehicles) break this, and settling
+        recycling first can then use more recycled material than a
+        battery-by-battery interleaving would.
+        """
+        if self.recycler_router is not None:
+            self.recycler_router.settle()
+        else:
+            for recycler in self.recyclers:
+                recycler.settle()
+        if self.manufacturer_router is not None:
+            self.manufacturer_router.settle()
+        else:
+            for manufacturer in self.manufacturers:
+                manufacturer.settle()
+    
+    def release_retired_owners(self):
+        """Take this year's retired vehicles out of the fleet and return how many there were.
+        
+        Retired EVOwner objects leave the scheduler and the model but stay in
+        retired_owners, so this year's growth can reuse them.
+        """
+        if self.owner_population is not None:
+            return self.owner_population.vehicles_retired
+        if not self.retired_owners:
+            return 0
+        retired = set(self.retired_owners)
+        self.ev_owners = [owner for owner in self.ev_owners if owner not in retired]
+        for owner in self.retired_owners:
+            self.schedule.remove(owner)
+            owner.remove()
+        return len(retired)
+    
+    def add_ev_owners(self, count):
+        """Add `count` new EV owners, all starting with new batteries."""
+        if self.owner_population is not None:
+            self.owner_population.add_owners(count)
+            return
+        
+        vehicle_lifespans = self.draw_vehicle_lifespans(count)
+        for i in range(count):
+            vehicle_lifespan = self.vehicle_lifespan_at(vehicle_lifespans, i)
+            if self.retired_owners:
+                ev_owner = self.retired_owners.pop()  # Reuse a retired vehicle's object
+                ev_owner.reuse(self.get_next_id(), vehicle_lifespan)
+            else:
+                ev_owner = self.owner_class(self.get_next_id(), self, 0, vehicle_lifespan)  # New cars with new batteries
+            self.schedule.add(ev_owner)
+            self.ev_owners.append(ev_owner)
     
     def calculate_lithium_demand(self):
         """Calculate the total lithium demand for the current year."""
@@ -179,4 +464,49 @@ class EVBatteryModel(mesa.Model):
     
     def calculate_cobalt_demand(self):
         """Calculate the total cobalt demand for the current year."""
-        return self.new_cobalt_required 
\ No newline at end of file
+        return self.new_cobalt_required
+    
+    def material(self, values, material):
+        """Read one material's entry from a ledger vector."""
+        return float(values[self.ledger.index[material]])
+    
+    @property
+    def recycling_backlog(self):
+        return self.recycler_router.backlog if self.recycler_router is not None else 0
+    
+    @property
+    def production_backlog(self):
+        return self.manufacturer_router.backlog if self.manufacturer_router is not None else 0
+    
+    # Material totals for lithium and cobalt, read from the ledger
+    @property
+    def recycled_lithium(self):
+        return self.material(self.ledger.pool, "lithium")  # Current available pool
+    
+    @property
+    def recycled_cobalt(self):
+        return self.material(self.ledger.pool, "cobalt")  # Current available pool
+    
+    @property
+    def new_lithium_required(self):
+        return self.material(self.ledger.new_required, "lithium")
+    
+    @property
+    def new_cobalt_required(self):
+        return self.material(self.ledger.new_required, "cobalt")
+    
+    @property
+    def total_lithium_recycled(self):
+        return self.material(self.ledger.total_recycled, "lithium")  # Total ever recycled
+    
+    @property
+    def total_cobalt_recycled(self):
+        return self.material(self.ledger.total_recycled, "cobalt")  # Total ever recycled
+    
+    @property
+    def total_lithium_used_from_recycled(self):
+        return self.material(self.ledger.total_used_from_recycled, "lithium")
+    
+    @property
+    def total_cobalt_used_from_recycled(self):
+        return self.material(self.ledger.total_used_from_recycled, "cobalt")
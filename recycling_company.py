@@ -1,46 +1,61 @@
 import mesa
+import numpy as np
 
 class RecyclingCompany(mesa.Agent):
     """An agent representing a battery recycling company."""
     
-    def __init__(self, unique_id, model):
+    def __init__(self, unique_id, model, capacity=None, cost=1.0):
         super().__init__(unique_id, model)
+        self.capacity = capacity  # Batteries processed per year (None: unlimited)
+        self.cost = cost  # Relative processing cost, used to route batteries
         self.batteries_received = 0
-        self.lithium_recycled = 0
-        self.cobalt_recycled = 0
+        self.pending_batteries = 0  # Received one at a time, not yet processed
+        # Materials recovered, one entry per material in the model's ledger
+        self.materials_recycled = np.zeros(len(model.ledger.materials))
         # Add tracking for annual recycling
         self.annual_batteries_received = 0
-        self.annual_lithium_recycled = 0
-        self.annual_cobalt_recycled = 0
+        self.annual_materials_recycled = np.zeros(len(model.ledger.materials))
+    
+    @property
+    def lithium_recycled(self):
+        return self.materials_recycled[self.model.ledger.index["lithium"]]
+    
+    @property
+    def cobalt_recycled(self):
+        return self.materials_recycled[self.model.ledger.index["cobalt"]]
     
     def receive_battery(self):
-        """Process a battery that has been sent for recycling."""
+        """Accept a battery for recycling; it is processed in bulk by settle()."""
+        self.pending_batteries += 1
+    
+    def settle(self):
+        """Process all batteries received one at a time since the last settle."""
+        if self.pending_batteries:
+            count, self.pending_batteries = self.pending_batteries, 0
+            self.process_batteries(count)
+    
+    def receive_batteries(self, count):
+        """Accept a batch of `count` batteries, processed now unless capacity is limited."""
+        if self.capacity is not None:
+            self.pending_batteries += count  # Routed by the model's CapacityRouter
+            return
+        self.process_batteries(count)
+    
+    def process_batteries(self, count):
+        """Process a batch of `count` batteries sent for recycling."""
         # Increment battery counter
-        self.batteries_received += 1
-        self.annual_batteries_received += 1
+        self.batteries_received += count
+        self.annual_batteries_received += count
         
-        # Calculate amount of materials that can be recycled based on efficiency
-        efficiency = self.model.recycling_efficiency
-        lithium_recovered = self.model.lithium_per_battery * efficiency
-        cobalt_recovered = self.model.cobalt_per_battery * efficiency
+        # Recover materials based on efficiency into the model's recycled pool
+        recovered = self.model.ledger.receive_batteries(count, self.model.recycling_efficiency)
         
         # Update counters
-        self.lithium_recycled += lithium_recovered
-        self.cobalt_recycled += cobalt_recovered
-        self.annual_lithium_recycled += lithium_recovered
-        self.annual_cobalt_recycled += cobalt_recovered
-        
-        # Add to model's recycled materials pool (current available)
-        self.model.recycled_lithium += lithium_recovered
-        self.model.recycled_cobalt += cobalt_recovered
-        
-        # Add to model's cumulative totals for tracking
-        self.model.total_lithium_recycled += lithium_recovered
-        self.model.total_cobalt_recycled += cobalt_recovered
+        self.materials_recycled += recovered
+        self.annual_materials_recycled += recovered
     
     def step(self):
         """Actions during each step (year)."""
         # Reset only the annual counters
         self.annual_batteries_received = 0
-        self.annual_lithium_recycled = 0
-        self.annual_cobalt_recycled = 0 
\ No newline at end of file
+        self.annual_materials_recycled[:] = 0
@@ -0,0 +1,237 @@
+import argparse
+import multiprocessing
+import threading
+import time
+import traceback
+import numpy as np
+import pandas as pd
+from constants import REGIONS, REGION_EXPORT_SHARE, START_YEAR, END_YEAR, RANDOM_SEED
+
+# Name of the world totals in RegionalModel.run results
+GLOBAL = "Global"
+
+# Columns added up over regions for the world totals
+GLOBAL_COLUMNS = [
+    "Number of EVs",
+    "Total Lithium Demand",
+    "Total Cobalt Demand",
+    "Recycled Lithium",
+    "Recycled Cobalt",
+    "New Lithium Required",
+    "New Cobalt Required",
+]
+
+def trade(pools, fleets, per_battery, export_shares):
+    """Net imports of recycled material, one row per region and column per material.
+    
+    Each region offers `export_shares` of its pool, and every offer is split
+    over the other regions in proportion to their battery material demand
+    (fleet size times material per battery). Offers no other region has a
+    demand for stay at home, so the rows always add up to zero.
+    """
+    exports = pools * export_shares[:, None]
+    demand = fleets[:, None] * per_battery
+    net = -exports
+    for r in range(len(pools)):
+        others = demand.copy()
+        others[r] = 0
+        total = others.sum(axis=0)
+        net += exports[r] * np.divide(others, total, out=np.zeros_like(others), where=total > 0)
+        net[r] += np.where(total > 0, 0, exports[r])
+    return net
+
+def region_worker(connection, params):
+    """Run one region's model, trading recycled material through `connection` once a year.
+    
+    The model's ledger sends its pool balances and fleet size at the yearly
+    exchange and blocks until the coordinator replies with net imports.
+    """
+    from model import EVBatteryModel
+    from run import run_until_done
+    
+    try:
+        model = EVBatteryModel(**params)
+        ledger = model.ledger
+        connection.send(("ready", (ledger.materials, ledger.per_battery)))
+        
+        def exchange(pool):
+            connection.send(("exchange", np.append(pool, model.num_ev_owners)))
+            return connection.recv()
+        
+        ledger.exchange = exchange
+        connection.send(("results", run_until_done(model, verbose=False)))
+    except Exception:
+        try:
+            connection.send(("error", traceback.format_exc()))
+        except OSError:
+            pass  # The coordinator has gone
+    finally:
+        connection.close()
+
+def receive(connection):
+    """Next (tag, payload) message from a region worker, raising on worker errors."""
+    tag, payload = connection.recv()
+    if tag == "error":
+        raise RuntimeError(f"A region worker failed:\n{payload}")
+    return tag, payload
+
+def global_results(results):
+    """World totals over the per-region results (name -> DataFrame)."""
+    frames = list(results.values())
+    totals = sum(frame[GLOBAL_COLUMNS] for frame in frames)
+    totals.insert(0, "Year", frames[0]["Year"])
+    # Efficiency of the world fleet, weighting regions by their number of EVs
+    weighted = sum(frame["Recycling Efficiency"] * frame["Number of EVs"] for frame in frames)
+    totals.insert(2, "Recycling Efficiency", weighted / totals["Number of EVs"])
+    # Trade between regions nets out, so the world imports nothing
+    for column in frames[0].columns:
+        if column.startswith("Net ") and column.endswith(" Imports"):
+            totals[column] = 0.0
+    return totals
+
+class RegionalModel:
+    """Partitioned model of several regional markets trading recycled material.
+    
+    Each region is a full EVBatteryModel with its own parameters (growth
+    rates, recycling behaviour, facilities, owner backend...), stepped in
+    its own worker process. Regions only synchronise once a year: each sends
+    its recycled material pool and fleet size, the coordinator waits for all
+    of them (the barrier), settles trade (see trade) and replies with every
+    region's net imports. Between barriers regions step independently, so
+    with a process per region a year takes as long as the slowest region
+    plus the barrier's round trip. That only pays off with a CPU per region
+    and regions large enough to outweigh starting the processes and sending
+    back their results: on one CPU, REGIONS run to 2035 took about 1.3 s in
+    parallel against 0.5 s serially, and to 2100 about 41 s against 37 s.
+    With `parallel=False` regions run in threads of this process instead,
+    with identical results.
+    """
+    
+    def __init__(self, regions=REGIONS, seed=None, parallel=True):
+        self.names = [name for name, _ in regions]
+        if GLOBAL in self.names or len(set(self.names)) != len(self.names):
+            raise ValueError(f"Region names must be unique and not {GLOBAL!r}")
+        self.export_shares = np.array([params.get("export_share", REGION_EXPORT_SHARE) for _, params in regions],
+                                      dtype=np.float64)
+        if ((self.export_shares < 0) | (self.export_shares > 1)).any():
+            raise ValueError("Export shares must be between 0 and 1")
+        
+        # Region seeds are derived like ensemble seeds, unless a region has its own
+        from ensemble import replication_seed
+        self.params = []
+        for name, params in regions:
+            params = {key: value for key, value in params.items() if key != "export_share"}
+            if seed is not None:
+                params.setdefault("seed", replication_seed(seed, name, 0))
+            self.params.append(params)
+        
+        years = {(params.get("start_year", START_YEAR), params.get("end_year", END_YEAR))
+                 for params in self.params}
+        if len(years) > 1:
+            raise ValueError("All regions must share the start and end years")
+        self.parallel = parallel
+    
+    def run(self):
+        """Run every region to the end year.
+        
+        Returns a dict of region name to results, with "Net <Material>
+        Imports" columns for lithium and cobalt, followed by the world
+        totals under GLOBAL.
+        """
+        Worker = multiprocessing.Process if self.parallel else threading.Thread
+        connections, workers = [], []
+        for params in self.params:
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = Worker(target=region_worker, args=(worker_connection, params), daemon=True)
+            worker.start()
+            connections.append(connection)
+            workers.append(worker)
+        
+        try:
+            ready = [receive(connection)[1] for connection in connections]
+            materials = ready[0][0]
+            if any(region_materials != materials for region_materials, _ in ready):
+                raise ValueError("All regions must track the same materials")
+            per_battery = np.stack([region_per_battery for _, region_per_battery in ready])
+            
+            # One barrier per simulated year, until every region returns its results
+            imports = []
+            while True:
+                messages = [receive(connection) for connection in connections]
+                tags = {tag for tag, _ in messages}
+                if tags == {"results"}:
+                    break
+                if tags != {"exchange"}:
+                    raise RuntimeError("Regions fell out of step")
+                balances = np.stack([payload for _, payload in messages])
+                net = trade(balances[:, :-1], balances[:, -1], per_battery, self.export_shares)
+                for connection, region_net in zip(connections, net):
+                    connection.send(region_net)
+                imports.append(net)
+        except BaseException:
+            # Forked workers hold copies of the coordinator's pipe ends, so
+            # they would not see them close
+            if self.parallel:
+                for worker in workers:
+                    worker.terminate()
+            raise
+        finally:
+            for connection in connections:
+                connection.close()
+            for worker in workers:
+                worker.join()
+        
+        # Trade starts with the first simulated year, after the initial row
+        imports = np.concatenate([np.zeros((1,) + per_battery.shape), np.stack(imports)])
+        results = {}
+        for r, (name, (_, frame)) in enumerate(zip(self.names, messages)):
+            for material in ("lithium", "cobalt"):
+                frame[f"Net {material.capitalize()} Imports"] = imports[:, r, materials.index(material)]
+            results[name] = frame
+        results[GLOBAL] = global_results(results)
+        return results
+
+def regional_summary(results):
+    """Summary table with one row per region and one for the world."""
+    from reporting import summarize
+    
+    rows = []
+    for name, frame in results.items():
+        row = summarize(name, frame)
+        for material in ("Lithium", "Cobalt"):
+            column = f"Net {material} Imports"
+            if column in frame:
+                row[f"Cumulative {column}"] = frame[column].sum()
+        rows.append(row)
+    return pd.DataFrame(rows).rename(columns={"Scenario": "Region"})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the multi-region model with trade in recycled material.")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="base seed for the regions")
+    parser.add_argument("--end-year", type=int, help="last simulated year")
+    parser.add_argument("--backend", help="owner backend for every region")
+    parser.add_argument("--serial", action="store_true", help="step regions in threads of one process")
+    parser.add_argument("--output", help="write all regions' results to this CSV file")
+    parser.add_argument("--figure", help="write a region comparison figure to this path")
+    args = parser.parse_args()
+    
+    overrides = {
+        name: value
+        for name, value in (("end_year", args.end_year), ("owner_backend", args.backend))
+        if value is not None
+    }
+    regions = [(name, {**params, **overrides}) for name, params in REGIONS]
+    
+    start = time.perf_counter()
+    results = RegionalModel(regions, args.seed, parallel=not args.serial).run()
+    print(f"Ran {len(regions)} regions in {time.perf_counter() - start:.2f} s")
+    print(regional_summary(results).filter(regex="Region|Final New|Cumulative Net").to_string(index=False))
+    
+    if args.output:
+        frames = [frame.assign(Region=name) for name, frame in results.items()]
+        pd.concat(frames, ignore_index=True).to_csv(args.output, index=False)
+        print(f"Saved results to {args.output}")
+    if args.figure:
+        from reporting import plot_comparison
+        plot_comparison(results, args.figure)
+        print(f"Saved the region comparison to {args.figure}")
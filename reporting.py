@@ -0,0 +1,141 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from constants import REPORT_DIR, REPORT_MAX_POINTS, REPORT_WORKERS
+
+# Series compared across scenarios: (column, title, y-axis label)
+COMPARISON_PLOTS = [
+    ("New Lithium Required", "New Lithium Demand Over Time", "Lithium (kg)"),
+    ("New Cobalt Required", "New Cobalt Demand Over Time", "Cobalt (kg)"),
+    ("Recycled Lithium", "Recycled Lithium Over Time", "Lithium (kg)"),
+    ("Recycling Efficiency", "Recycling Efficiency Over Time", "Efficiency (%)"),
+]
+
+# Columns summarised per scenario by their final, cumulative and peak values
+SUMMARY_COLUMNS = ["New Lithium Required", "New Cobalt Required",
+                   "Recycled Lithium", "Recycled Cobalt"]
+
+def downsample(frame, max_points=REPORT_MAX_POINTS):
+    """Evenly spaced rows of `frame`, always keeping the first and last."""
+    if max_points is None or len(frame) <= max_points:
+        return frame
+    rows = np.unique(np.linspace(0, len(frame) - 1, max_points).round().astype(np.int64))
+    return frame.iloc[rows]
+
+def plot_comparison(results, path):
+    """Plot every scenario in `results` (name -> DataFrame) on shared axes."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    for ax, (column, title, ylabel) in zip(axes.flat, COMPARISON_PLOTS):
+        for name, frame in results.items():
+            ax.plot(frame["Year"], frame[column], label=name)
+        ax.set_title(title)
+        ax.set_xlabel("Year")
+        ax.set_ylabel(ylabel)
+        if len(results) <= 10:
+            ax.legend()
+    
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close(fig)
+
+def plot_scenario(name, frame, path):
+    """Plot material demand and recycling for one scenario."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    
+    fig, (demand, recycled) = plt.subplots(1, 2, figsize=(12, 4))
+    for column in ("Total Lithium Demand", "New Lithium Required",
+                   "Total Cobalt Demand", "New Cobalt Required"):
+        demand.plot(frame["Year"], frame[column], label=column)
+    demand.set_title(f"Material Demand ({name})")
+    demand.set_ylabel("Material (kg)")
+    demand.legend()
+    for column in ("Recycled Lithium", "Recycled Cobalt"):
+        recycled.plot(frame["Year"], frame[column], label=column)
+    recycled.set_title(f"Recycled Materials ({name})")
+    recycled.set_ylabel("Material (kg)")
+    recycled.legend()
+    
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close(fig)
+
+def summarize(name, frame):
+    """One summary-table row for a scenario's full (not downsampled) results."""
+    row = {"Scenario": name, "Final Year": int(frame["Year"].iloc[-1])}
+    for column in SUMMARY_COLUMNS:
+        row[f"Final {column}"] = frame[column].iloc[-1]
+        row[f"Cumulative {column}"] = frame[column].sum()
+        row[f"Peak {column}"] = frame[column].max()
+    return row
+
+def render_scenario(name, frame, directory):
+    """Worker-side job: write one scenario's figure."""
+    plot_scenario(name, frame, os.path.join(directory, f"{name}.png"))
+
+class ReportingPipeline:
+    """Renders reports in a background process while scenarios keep simulating.
+    
+    Each finished scenario is submitted with submit(); its summary row is
+    computed right away from the full results, and a downsampled copy is
+    queued for the worker, which draws the scenario's figure. close() waits
+    for the queue to drain, draws the comparison figure across all scenarios
+    and writes the summary table, with demand reductions against the
+    `reference` scenario when one was submitted.
+    """
+    
+    def __init__(self, directory=REPORT_DIR, comparison_path=None, max_points=REPORT_MAX_POINTS,
+                 reference="no_recycling", workers=REPORT_WORKERS):
+        self.directory = directory
+        self.comparison_path = comparison_path or os.path.join(directory, "comparison.png")
+        self.max_points = max_points
+        self.reference = reference
+        self.rows = []
+        self.series = {}
+        self.pending = []
+        self.summary = None  # Set by close()
+        os.makedirs(directory, exist_ok=True)
+        
+        # Rendering runs in its own processes, so matplotlib never loads in the simulation's
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.executor.shutdown(cancel_futures=True)
+    
+    def submit(self, name, frame):
+        """Queue one scenario's results for reporting."""
+        self.rows.append(summarize(name, frame))
+        series = downsample(frame, self.max_points)
+        self.series[name] = series
+        self.pending.append(self.executor.submit(render_scenario, name, series, self.directory))
+    
+    def close(self):
+        """Finish all queued reports and return the summary table (again, if already closed)."""
+        if self.summary is not None:
+            return self.summary
+        comparison = self.executor.submit(plot_comparison, self.series, self.comparison_path)
+        for future in self.pending + [comparison]:
+            future.result()
+        self.executor.shutdown()
+        
+        summary = pd.DataFrame(self.rows)
+        reference = summary[summary["Scenario"] == self.reference]
+        if not reference.empty:
+            for column in ("New Lithium Required", "New Cobalt Required"):
+                baseline = reference[f"Final {column}"].iloc[0]
+                summary[f"Final {column} Reduction (%)"] = (1 - summary[f"Final {column}"] / baseline) * 100
+        summary.to_csv(os.path.join(self.directory, "summary.csv"), index=False)
+        self.summary = summary
+        return summary
@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import inspect
+import io
+import json
+import os
+import mesa
+import numpy as np
+import pandas as pd
+from constants import CACHE_DIR, CACHE_MAX_BYTES
+
+# Source files whose contents determine model results; editing any of them
+# changes the model version and so invalidates every cached run
+MODEL_SOURCE_FILES = (
+    "constants.py",
+    "model.py",
+    "ev_owner.py",
+    "battery_manufacturer.py",
+    "recycling_company.py",
+    "material_ledger.py",
+    "slotted_owners.py",
+    "vectorized_owners.py",
+    "social_network.py",
+    "cohort_owners.py",
+    "calendar_owners.py",
+    "capacity_router.py",
+    "columnar_collector.py",
+)
+
+# Model arguments that only choose where output goes or what is measured,
+# not the results, so they are left out of cache keys
+UNKEYED_PARAMS = ("collector_path", "instrument", "profile_path")
+
+def model_version():
+    """Hash of the model source files and the library versions they run on."""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in MODEL_SOURCE_FILES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(name.encode())
+            digest.update(f.read())
+    digest.update(f"mesa={mesa.__version__};numpy={np.__version__}".encode())
+    return digest.hexdigest()
+
+def save_frame(path, results):
+    """Write a results frame to `path` as a compressed columnar .npz file.
+    
+    The file is written under a temporary name and renamed into place, so
+    concurrent readers never see a partial file.
+    """
+    arrays = {}
+    for i, name in enumerate(results.columns):
+        values = results[name].to_numpy()
+        # Text columns (e.g. scenario names) are stored as fixed-width strings
+        arrays[f"column_{i}"] = values.astype(str) if values.dtype == object else values
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, columns=np.array(results.columns, dtype=str),
+                        index=results.index.to_numpy(), **arrays)
+    
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(temporary, path)
+
+def load_frame(path):
+    """Read a results frame written by save_frame."""
+    with np.load(path) as data:
+        columns = data["columns"].tolist()
+        return pd.DataFrame({name: data[f"column_{i}"] for i, name in enumerate(columns)},
+                            index=data["index"])
+
+class ResultCache:
+    """Content-addressed on-disk cache of model results.
+    
+    Entries are keyed by the EVBatteryModel constructor arguments (defaults
+    included, UNKEYED_PARAMS left out), the seed and the model version, and
+    hold the DataCollector output as a compressed columnar .npz file.
+    Unseeded runs are never cached since they cannot be reproduced.
+    """
+    
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._version = None
+    
+    def key(self, params):
+        """Cache key for a run with the given model parameters, or None if unseeded."""
+        from model import EVBatteryModel
+        
+        arguments = inspect.signature(EVBatteryModel.__init__).bind(None, **params)
+        arguments.apply_defaults()
+        arguments = dict(arguments.arguments)
+        for name in ("self",) + UNKEYED_PARAMS:
+            del arguments[name]
+        if arguments["seed"] is None:
+            return None
+        
+        if self._version is None:
+            self._version = model_version()
+        payload = json.dumps({"params": arguments, "version": self._version},
+                             sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+    
+    def get(self, params):
+        """Return cached results for `params`, or None on a miss."""
+        key = self.key(params)
+        if key is None or not os.path.exists(self.path(key)):
+            return None
+        
+        results = load_frame(self.path(key))
+        
+        # Mark as recently used for eviction
+        os.utime(self.path(key))
+        return results
+    
+    def put(self, params, results):
+        """Store results for `params` and evict old entries beyond the size limit."""
+        key = self.key(params)
+        if key is None:
+            return
+        
+        # Written atomically so concurrent workers never see a partial file
+        os.makedirs(self.directory, exist_ok=True)
+        save_frame(self.path(key), results)
+        
+        self.evict()
+    
+    def entries(self):
+        """Cached files as (path, size, last used), most recently used first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue  # Evicted by another process since the listing
+                entries.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)
+    
+    def evict(self):
+        """Drop least recently used entries until the cache fits in `max_bytes`."""
+        total = 0
+        for path, size, _ in self.entries():
+            total += size
+            if total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Another process evicted it first
+    
+    def invalidate(self, params=None):
+        """Remove the entry for `params`, or every entry if no params are given."""
+        if params is not None:
+            key = self.key(params)
+            paths = [self.path(key)] if key is not None else []
+        else:
+            paths = [path for path, _, _ in self.entries()]
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the model result cache.")
+    parser.add_argument("command", choices=["info", "clear"])
+    parser.add_argument("--dir", default=CACHE_DIR, help="cache directory")
+    args = parser.parse_args()
+    
+    cache = ResultCache(args.dir)
+    if args.command == "clear":
+        print(f"Removed {cache.invalidate()} cached runs from {args.dir}")
+    else:
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"{len(entries)} cached runs, {total / 1e6:.1f} MB of {cache.max_bytes / 1e6:.1f} MB in {args.dir}")
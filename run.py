@@ -1,24 +1,60 @@
-import mesa
-import pandas as pd
-import matplotlib.pyplot as plt
-from model import EVBatteryModel
+import argparse
+import json
+import sys
 import time
+from contextlib import nullcontext
+from model import EVBatteryModel, OWNER_BACKENDS
 from constants import (
     MAX_SIMULATION_STEPS,
     PROGRESS_REPORT_INTERVAL,
-    SCENARIOS
+    SCENARIOS,
+    RANDOM_SEED,
+    CACHE_DIR,
+    REPORT_DIR,
+    REPORT_WORKERS
 )
 
-def run_model(params=None, verbose=True, debug_efficiency=False):
-    """Run a single instance of the model with given parameters."""
+# Figure written by analyze_results unless another path (or none) is given
+DEFAULT_FIGURE = "recycling_analysis_results.png"
+
+def run_model(params=None, verbose=True, debug_efficiency=False, cache=None):
+    """Run a single instance of the model with given parameters.
+    
+    If a ResultCache is given, seeded runs are looked up there first and
+    stored there afterwards. Instrumented runs are always simulated, since
+    the cache keeps results but not timings or profiles.
+    """
     if params is None:
         params = {}
+    if params.get("data_collector") == "none":
+        raise ValueError('data_collector="none" keeps no results to return; '
+                         'read such runs year by year with streaming.stream_model')
+    
+    instrumented = params.get("instrument") or params.get("profile_path")
+    if cache is not None and not instrumented:
+        results = cache.get(params)
+        if results is not None:
+            if verbose:
+                print("Loaded results from cache")
+            return results
     
     # Create model with default or specified parameters
     model = EVBatteryModel(**params)
+    results = run_until_done(model, verbose, debug_efficiency)
+    
+    if cache is not None:
+        cache.put(params, results)
+    return results
+
+def run_until_done(model, verbose=True, debug_efficiency=False):
+    """Step an existing model until it stops running and return its results."""
+    if model.datacollector is None:
+        raise ValueError("The model keeps no results (data_collector=\"none\"); "
+                         "step it with streaming.stream_years instead")
     
-    # Set a maximum number of steps to prevent infinite loops
-    max_steps = MAX_SIMULATION_STEPS  # Should be enough for most simulations (2024-2124)
+    # Set a maximum number of steps to prevent infinite loops, but never
+    # fewer than the configured horizon (long cohort runs go past 2124)
+    max_steps = max(MAX_SIMULATION_STEPS, model.end_year - model.current_year + 1)
     step_count = 0
     
     # Debug initial efficiency value
@@ -46,8 +82,9 @@ def run_model(params=None, verbose=True, debug_efficiency=False):
             print(f"    Year {model.current_year-1}->{model.current_year}: Efficiency {old_efficiency:.4f} -> {model.recycling_efficiency:.4f} (change: +{(model.recycling_efficiency - old_efficiency):.4f})")
     
     end_time = time.time()
+    model.instrumentation.flush()
     
-    if step_count >= max_steps:
+    if model.running and step_count >= max_steps:
         print(f"WARNING: Model reached maximum step count ({max_steps}) - may have been an infinite loop")
     
     if verbose:
@@ -55,81 +92,56 @@ def run_model(params=None, verbose=True, debug_efficiency=False):
     
     # Get the DataCollector results
     results = model.datacollector.get_model_vars_dataframe()
+    
+    # Per-step timings and call counts travel with the results when enabled
+    if model.instrumentation.enabled:
+        instrumentation = model.instrumentation.get_dataframe()
+        results.attrs["instrumentation"] = instrumentation
+        if verbose:
+            phase_times = instrumentation.filter(like="Time (s)").sum()
+            for name, seconds in phase_times.items():
+                print(f"  {name}: {seconds:.3f}")
     return results
 
-def run_multiple_scenarios():
+def run_multiple_scenarios(seed=None, cache=None):
     """Run multiple scenarios with different parameters."""
+    from ensemble import replication_seed
+    
     results = {}
     for name, params in SCENARIOS:
         print(f"Running {name} scenario...")
+        if seed is not None:
+            params = {**params, "seed": replication_seed(seed, name, 0)}
         # Use debug_efficiency=True for baseline scenario only
-        results[name] = run_model(params, debug_efficiency=(name == "baseline"))
+        results[name] = run_model(params, debug_efficiency=(name == "baseline"), cache=cache)
     
     return results
 
-def analyze_results(results):
-    """Analyze and visualize results from different scenarios."""
-    print("Creating visualization plots...")
-    try:
-        # Create plots
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-        
-        # Plot 1: Lithium demand comparison
-        print("  - Plotting lithium demand comparison...")
-        ax1 = axes[0, 0]
-        results["baseline"]["New Lithium Required"].plot(ax=ax1, label="Baseline")
-        results["no_recycling"]["New Lithium Required"].plot(ax=ax1, label="No Recycling")
-        results["high_efficiency"]["New Lithium Required"].plot(ax=ax1, label="High Efficiency")
-        ax1.set_title("New Lithium Demand Over Time")
-        ax1.set_xlabel("Time Step (Years)")
-        ax1.set_ylabel("Lithium (kg)")
-        ax1.legend()
-        
-        # Plot 2: Cobalt demand comparison
-        print("  - Plotting cobalt demand comparison...")
-        ax2 = axes[0, 1]
-        results["baseline"]["New Cobalt Required"].plot(ax=ax2, label="Baseline")
-        results["no_recycling"]["New Cobalt Required"].plot(ax=ax2, label="No Recycling")
-        results["high_efficiency"]["New Cobalt Required"].plot(ax=ax2, label="High Efficiency")
-        ax2.set_title("New Cobalt Demand Over Time")
-        ax2.set_xlabel("Time Step (Years)")
-        ax2.set_ylabel("Cobalt (kg)")
-        ax2.legend()
-        
-        # Plot 3: Recycled materials in baseline
-        print("  - Plotting recycled materials...")
-        ax3 = axes[1, 0]
-        results["baseline"]["Recycled Lithium"].plot(ax=ax3, label="Recycled Lithium")
-        results["baseline"]["Recycled Cobalt"].plot(ax=ax3, label="Recycled Cobalt")
-        ax3.set_title("Recycled Materials (Baseline Scenario)")
-        ax3.set_xlabel("Time Step (Years)")
-        ax3.set_ylabel("Material (kg)")
-        ax3.legend()
-        
-        # Plot 4: Recycling Efficiency
-        print("  - Plotting recycling efficiency...")
-        ax4 = axes[1, 1]
-        results["baseline"]["Recycling Efficiency"].plot(ax=ax4, label="Baseline")
-        results["high_efficiency"]["Recycling Efficiency"].plot(ax=ax4, label="High Efficiency")
-        ax4.set_title("Recycling Efficiency Over Time")
-        ax4.set_xlabel("Time Step (Years)")
-        ax4.set_ylabel("Efficiency (%)")
-        ax4.legend()
-        
-        plt.tight_layout()
-        print("Saving visualization to recycling_analysis_results.png...")
-        plt.savefig("recycling_analysis_results.png")
-        
-        # Don't use plt.show() in non-interactive environments, it can block execution
-        # Only try to show the plot if in an interactive environment
-        import os
-        if os.environ.get('DISPLAY') or os.name == 'nt':
-            plt.close()  # Close the plot to prevent memory leaks
-        
-        print("Visualization completed and saved.")
-    except Exception as e:
-        print(f"Error during visualization: {e}")
-        print("Continuing with numerical analysis...")
+def demand_reduction(results, column):
+    """Percentage by which baseline recycling lowers `column` in the final year."""
+    baseline = results["baseline"][column].iloc[-1]
+    no_recycling = results["no_recycling"][column].iloc[-1]
+    return (1 - (baseline / no_recycling)) * 100
+
+def plot_results(results, path=DEFAULT_FIGURE):
+    """Plot every scenario on shared axes to `path`; matplotlib is only imported here."""
+    from reporting import downsample, plot_comparison
+    
+    plot_comparison({name: downsample(frame) for name, frame in results.items()}, path)
+
+def analyze_results(results, figure=DEFAULT_FIGURE):
+    """Analyze and visualize results from different scenarios.
+    
+    With `figure` set to None no plot is drawn and matplotlib is never imported.
+    """
+    if figure is not None:
+        print("Creating visualization plots...")
+        try:
+            plot_results(results, figure)
+            print("Visualization completed and saved.")
+        except Exception as e:
+            print(f"Error during visualization: {e}")
+            print("Continuing with numerical analysis...")
     
     # Calculate percentage reduction in demand due to recycling
     print("Calculating reduction percentages...")
@@ -142,11 +154,11 @@ def analyze_results(results):
         
         lithium_baseline = baseline.loc[final_year, "New Lithium Required"]
         lithium_no_recycling = no_recycling.loc[final_year, "New Lithium Required"]
-        lithium_reduction = (1 - (lithium_baseline / lithium_no_recycling)) * 100
+        lithium_reduction = demand_reduction(results, "New Lithium Required")
         
         cobalt_baseline = baseline.loc[final_year, "New Cobalt Required"]
         cobalt_no_recycling = no_recycling.loc[final_year, "New Cobalt Required"]
-        cobalt_reduction = (1 - (cobalt_baseline / cobalt_no_recycling)) * 100
+        cobalt_reduction = demand_reduction(results, "New Cobalt Required")
         
         print(f"By {final_year}, recycling reduces lithium demand by {lithium_reduction:.2f}%")
         print(f"By {final_year}, recycling reduces cobalt demand by {cobalt_reduction:.2f}%")
@@ -169,24 +181,116 @@ def analyze_results(results):
             "cobalt_reduction": 0
         }
 
-if __name__ == "__main__":
-    # Run multiple scenarios
-    print("Running model scenarios...")
-    try:
-        # Run with a smaller end year for faster testing if needed
-        # Uncomment the line below to use a shorter simulation period
-        # EVBatteryModel.end_year = 2030  # This will make the simulation run much faster
-        
-        scenario_results = run_multiple_scenarios()
-        
-        # Analyze the results
-        print("Analyzing results...")
-        reduction_percentages = analyze_results(scenario_results)
+def load_scenarios(path):
+    """Read scenarios from a JSON file.
+    
+    The file holds either an object mapping scenario names to parameter
+    dicts or a list of [name, params] pairs, like SCENARIOS.
+    """
+    with open(path) as f:
+        scenarios = json.load(f)
+    if isinstance(scenarios, dict):
+        return list(scenarios.items())
+    return [(name, params) for name, params in scenarios]
+
+def main(argv=None):
+    """Command-line entry point for scripted and batch runs."""
+    parser = argparse.ArgumentParser(description="Run EVBatteryModel scenarios.")
+    parser.add_argument("--scenarios", help="JSON file of scenarios (default: the built-in SCENARIOS)")
+    parser.add_argument("--params", help="JSON file of parameters applied to every scenario")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="base seed for every run")
+    parser.add_argument("--replications", type=int, default=1, help="runs per scenario")
+    parser.add_argument("--start-year", type=int, help="first simulated year")
+    parser.add_argument("--end-year", type=int, help="last simulated year")
+    parser.add_argument("--backend", choices=OWNER_BACKENDS, help="owner backend")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--common-random-numbers", action="store_true",
+                        help="share random streams across scenarios and report paired differences "
+                             "from the baseline with their measured variance reduction")
+    parser.add_argument("--output", help="write all results to this CSV file")
+    parser.add_argument("--results-only", action="store_true",
+                        help="skip analysis and plotting; write CSV results (to stdout without --output)")
+    parser.add_argument("--figure", default=DEFAULT_FIGURE, help="figure path for the analysis")
+    parser.add_argument("--no-figure", action="store_true", help="analyze without plotting")
+    parser.add_argument("--report-dir", default=REPORT_DIR,
+                        help="directory for per-scenario figures and the summary table")
+    parser.add_argument("--report-workers", type=int, default=REPORT_WORKERS,
+                        help="background processes rendering figures")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="result cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    args = parser.parse_args(argv)
+    
+    from ensemble import iter_ensemble, merge_results, paired_differences, scenario_results
+    
+    # Command-line settings override the parameter file, which scenarios override
+    base_params = {}
+    if args.params:
+        with open(args.params) as f:
+            base_params = json.load(f)
+    overrides = {
+        name: value
+        for name, value in (("start_year", args.start_year), ("end_year", args.end_year),
+                            ("owner_backend", args.backend))
+        if value is not None
+    }
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else SCENARIOS
+    scenarios = [(name, {**base_params, **params, **overrides}) for name, params in scenarios]
+    
+    cache = None
+    if not args.no_cache:
+        from results_cache import ResultCache
+        cache = ResultCache(args.cache_dir)
+    
+    if args.results_only:
+        frames = list(iter_ensemble(scenarios, args.replications, args.seed, args.workers, cache,
+                                   args.common_random_numbers))
+        merge_results(frames).to_csv(args.output or sys.stdout, index=False)
+        return
+    
+    # Scenarios are reported in the background as their first replication finishes
+    print(f"Running {len(scenarios)} scenarios x {args.replications} replications...")
+    frames = []
+    reporting = nullcontext()
+    if not args.no_figure:
+        from reporting import ReportingPipeline
+        reporting = ReportingPipeline(args.report_dir, comparison_path=args.figure,
+                                      workers=args.report_workers)
+    # The pipeline's rendering processes are shut down even if a run fails
+    with reporting as pipeline:
+        for frame in iter_ensemble(scenarios, args.replications, args.seed, args.workers, cache,
+                                   args.common_random_numbers):
+            frames.append(frame)
+            if pipeline is not None and frame["Replication"].iloc[0] == 0:
+                pipeline.submit(frame["Scenario"].iloc[0], frame)
         
-        # Print a summary
-        print("\nSummary of Findings:")
-        print(f"- With the baseline recycling scenario, lithium demand decreased by {reduction_percentages['lithium_reduction']:.2f}%")
-        print(f"- With the baseline recycling scenario, cobalt demand decreased by {reduction_percentages['cobalt_reduction']:.2f}%")
+        if args.output:
+            merge_results(frames).to_csv(args.output, index=False)
+            print(f"Saved results to {args.output}")
+        if pipeline is not None:
+            summary = pipeline.close()
+            print(f"Saved reports to {args.report_dir} and the comparison figure to {args.figure}")
+            print(summary.filter(regex="Scenario|Final New").to_string(index=False))
+    
+    # Paired differences, with the variance reduction pairing achieved for
+    # these scenarios (it can be small)
+    results = scenario_results(frames)
+    if args.common_random_numbers and "baseline" in results and len(results) > 1:
+        differences = paired_differences(frames, "baseline")
+        print("\nPaired differences from the baseline (common random numbers):")
+        print(differences.to_string(index=False))
+    
+    # Recycling findings need the baseline and no-recycling scenarios
+    if "baseline" not in results or "no_recycling" not in results:
+        return
+    print("Analyzing results...")
+    reduction_percentages = analyze_results(results, figure=None)
+    
+    # Print a summary
+    print("\nSummary of Findings:")
+    print(f"- With the baseline recycling scenario, lithium demand decreased by {reduction_percentages['lithium_reduction']:.2f}%")
+    print(f"- With the baseline recycling scenario, cobalt demand decreased by {reduction_percentages['cobalt_reduction']:.2f}%")
+    if not args.no_figure:
         print("- See the generated figure for detailed comparisons between scenarios.")
-    except Exception as e:
-        print(f"An error occurred during model execution: {e}") 
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
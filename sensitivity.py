@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from constants import EV_GROWTH_RATES, SENSITIVITY_BOOTSTRAP
+
+# Factors and their (low, high) ranges; growth-rate segments are addressed
+# as ev_growth_rates[<period>]
+SENSITIVITY_PARAMETERS = {
+    "recycling_efficiency_start": (0.4, 0.8),
+    "recycling_efficiency_growth": (0.0, 0.05),
+    "owner_recycling_probability": (0.2, 0.8),
+    "battery_lifespan_years": (6, 12),
+    "ev_growth_rates[2024-2030]": (0.05, 0.2),
+    "ev_growth_rates[2031-2035]": (0.05, 0.25),
+    "ev_growth_rates[2036-2050]": (0.0, 0.15),
+    "lithium_per_battery": (1.5, 3.5),
+    "cobalt_per_battery": (3.0, 9.0),
+}
+
+# Factors that only take whole-number values
+INTEGER_PARAMETERS = ("battery_lifespan_years",)
+
+def cumulative_new_lithium(results):
+    return results["New Lithium Required"].sum()
+
+def cumulative_new_cobalt(results):
+    return results["New Cobalt Required"].sum()
+
+DEFAULT_OUTPUTS = {
+    "Cumulative New Lithium": cumulative_new_lithium,
+    "Cumulative New Cobalt": cumulative_new_cobalt,
+}
+
+def model_params(parameters, point, base_params):
+    """Model keyword arguments for one point of the unit hypercube."""
+    params = dict(base_params)
+    growth_rates = dict(params.get("ev_growth_rates", EV_GROWTH_RATES))
+    for (name, (low, high)), u in zip(parameters.items(), point):
+        if name in INTEGER_PARAMETERS:
+            value = min(int(low + u * (high - low + 1)), high)
+        else:
+            value = low + u * (high - low)
+        if name.startswith("ev_growth_rates["):
+            growth_rates[name[len("ev_growth_rates["):-1]] = value
+        else:
+            params[name] = value
+    params["ev_growth_rates"] = growth_rates
+    return params
+
+def evaluate_point(task):
+    """Run the model at one design point and compute every output."""
+    from run import run_model
+    
+    params, seed, outputs = task
+    results = run_model({**params, "seed": seed}, verbose=False)
+    return [output(results) for output in outputs.values()]
+
+def evaluate(design, parameters, outputs, base_params, seeds, workers=None):
+    """Evaluate the model at every row of `design` (unit hypercube), in parallel batches."""
+    tasks = [
+        (model_params(parameters, point, base_params), int(seed), outputs)
+        for point, seed in zip(design, seeds)
+    ]
+    if workers == 1:
+        values = [evaluate_point(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            values = list(executor.map(evaluate_point, tasks, chunksize=max(1, len(tasks) // 64)))
+    return np.array(values, dtype=np.float64).reshape(len(tasks), len(outputs))
+
+def sample_seeds(seed, count):
+    """Independent per-sample model seeds derived from one analysis seed."""
+    return np.random.SeedSequence(seed).generate_state(count, dtype=np.uint64)
+
+def bootstrap_interval(statistic, samples, rng, bootstrap, confidence):
+    """Half-width of a percentile bootstrap interval of `statistic` over resampled rows."""
+    estimates = np.array([statistic(rng.integers(0, samples, size=samples)) for _ in range(bootstrap)])
+    low, high = np.nanpercentile(estimates, [50 * (1 - confidence), 50 * (1 + confidence)], axis=0)
+    return (high - low) / 2
+
+def morris_analysis(parameters=SENSITIVITY_PARAMETERS, outputs=DEFAULT_OUTPUTS, trajectories=10,
+                    levels=4, base_params=None, seed=0, workers=None,
+                    bootstrap=SENSITIVITY_BOOTSTRAP, confidence=0.95):
+    """Morris elementary-effects screening.
+    
+    Runs `trajectories` one-at-a-time trajectories of k + 1 points each and
+    returns, per output and factor, the mean (mu), mean absolute (mu_star) and
+    standard deviation (sigma) of the elementary effects, with a bootstrap
+    confidence half-width on mu_star. Trajectories start in the lower half
+    of the grid and only take up-steps (+delta), so every effect is
+    measured moving a factor from a lower to a higher value.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(parameters)
+    delta = levels / (2 * (levels - 1))
+    
+    # Each trajectory starts on the grid and moves one factor up by delta at a time
+    design = np.empty((trajectories, k + 1, k))
+    orders = np.empty((trajectories, k), dtype=np.int64)
+    for t in range(trajectories):
+        point = rng.integers(0, levels // 2, size=k) / (levels - 1)
+        orders[t] = rng.permutation(k)
+        design[t, 0] = point
+        for step, factor in enumerate(orders[t], start=1):
+            point = point.copy()
+            point[factor] += delta
+            design[t, step] = point
+    
+    # Points of one trajectory share a seed so effects are not masked by noise
+    seeds = np.repeat(sample_seeds(seed, trajectories), k + 1)
+    values = evaluate(design.reshape(-1, k), parameters, outputs, base_params or {}, seeds, workers)
+    values = values.reshape(trajectories, k + 1, len(outputs))
+    
+    effects = np.empty((trajectories, k, len(outputs)))
+    for t in range(trajectories):
+        effects[t, orders[t]] = (values[t, 1:] - values[t, :-1]) / delta
+    
+    mu_star_conf = bootstrap_interval(lambda rows: np.abs(effects[rows]).mean(axis=0),
+                                      trajectories, rng, bootstrap, confidence)
+    rows = []
+    for o, output in enumerate(outputs):
+        for i, name in enumerate(parameters):
+            rows.append({
+                "Output": output,
+                "Parameter": name,
+                "mu": effects[:, i, o].mean(),
+                "mu_star": np.abs(effects[:, i, o]).mean(),
+                "sigma": effects[:, i, o].std(ddof=1) if trajectories > 1 else 0.0,
+                "mu_star_conf": mu_star_conf[i, o],
+            })
+    return pd.DataFrame(rows)
+
+def sobol_analysis(parameters=SENSITIVITY_PARAMETERS, outputs=DEFAULT_OUTPUTS, samples=64,
+                   base_params=None, seed=0, workers=None,
+                   bootstrap=SENSITIVITY_BOOTSTRAP, confidence=0.95):
+    """Sobol first-order (S1) and total-order (ST) indices.
+    
+    Uses the A/B/AB_i sampling scheme: samples * (k + 2) model runs serve
+    both the Saltelli first-order and the Jansen total-order estimators.
+    Row j of A, B and every AB_i uses the same model seed. Confidence
+    half-widths come from bootstrapping rows.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(parameters)
+    a = rng.random((samples, k))
+    b = rng.random((samples, k))
+    ab = np.repeat(a[np.newaxis], k, axis=0)
+    for i in range(k):
+        ab[i, :, i] = b[:, i]
+    
+    design = np.concatenate([a, b, ab.reshape(-1, k)])
+    seeds = np.tile(sample_seeds(seed, samples), k + 2)
+    values = evaluate(design, parameters, outputs, base_params or {}, seeds, workers)
+    f_a = values[:samples]
+    f_b = values[samples:2 * samples]
+    f_ab = values[2 * samples:].reshape(k, samples, len(outputs))
+    
+    def indices(rows):
+        variance = np.var(np.concatenate([f_a[rows], f_b[rows]]), axis=0)
+        variance = np.where(variance > 0, variance, np.nan)
+        first = np.mean(f_b[rows] * (f_ab[:, rows] - f_a[rows]), axis=1) / variance
+        total = 0.5 * np.mean((f_a[rows] - f_ab[:, rows]) ** 2, axis=1) / variance
+        return np.stack([first, total])
+    
+    estimates = indices(np.arange(samples))
+    conf = bootstrap_interval(indices, samples, rng, bootstrap, confidence)
+    rows = []
+    for o, output in enumerate(outputs):
+        for i, name in enumerate(parameters):
+            rows.append({
+                "Output": output,
+                "Parameter": name,
+                "S1": estimates[0, i, o],
+                "S1_conf": conf[0, i, o],
+                "ST": estimates[1, i, o],
+                "ST_conf": conf[1, i, o],
+            })
+    return pd.DataFrame(rows)
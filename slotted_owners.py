@@ -0,0 +1,68 @@
+from ev_owner import step_owner
+
+class SlottedEVOwner:
+    """Compact per-vehicle owner record; behaviour lives in SlottedEVOwners."""
+    
+    __slots__ = ("battery_age", "has_recycled", "battery_replaced", "network_influence",
+                 "vehicle_age", "vehicle_lifespan")
+    
+    def __init__(self, battery_age=0, vehicle_lifespan=None):
+        self.battery_age = battery_age
+        self.has_recycled = False
+        self.battery_replaced = False
+        self.network_influence = 0
+        self.vehicle_age = battery_age
+        self.vehicle_lifespan = vehicle_lifespan
+
+class SlottedEVOwners:
+    """EV owners kept as slotted records in one list, outside the Mesa scheduler.
+    
+    Each owner still makes its own decision in random activation order, as
+    EVOwner does, but a vehicle costs one small object instead of a full
+    mesa.Agent registered in both the scheduler and model.ev_owners.
+    Records of retired vehicles are kept until the next step and reused for
+    the owners added in the meantime.
+    """
+    
+    def __init__(self, model, battery_ages=()):
+        self.model = model
+        vehicle_lifespans = model.draw_vehicle_lifespans(len(battery_ages))
+        self.owners = [
+            SlottedEVOwner(int(battery_age), model.vehicle_lifespan_at(vehicle_lifespans, i))
+            for i, battery_age in enumerate(battery_ages)
+        ]
+        self.free = []  # Records of vehicles retired in the last step
+        self.vehicles_retired = 0
+    
+    def __len__(self):
+        return len(self.owners)
+    
+    def add_owners(self, count, battery_age=0):
+        """Append `count` new owners in one bulk insertion, reusing retired records first."""
+        vehicle_lifespans = self.model.draw_vehicle_lifespans(count)
+        reused = min(count, len(self.free))
+        for i in range(reused):
+            owner = self.free.pop()
+            owner.__init__(battery_age, self.model.vehicle_lifespan_at(vehicle_lifespans, i))
+            self.owners.append(owner)
+        self.owners.extend([
+            SlottedEVOwner(battery_age, self.model.vehicle_lifespan_at(vehicle_lifespans, i))
+            for i in range(reused, count)
+        ])
+    
+    def step(self):
+        """Step every owner once, in random order, as EVOwner.step does."""
+        model = self.model
+        self.free.clear()
+        retired = []
+        model.random.shuffle(self.owners)
+        for owner in self.owners:
+            if step_owner(owner, model):
+                retired.append(owner)
+        
+        # Retired records leave the fleet and wait to be reused by add_owners
+        self.vehicles_retired = len(retired)
+        if retired:
+            retired_set = set(retired)
+            self.owners = [owner for owner in self.owners if owner not in retired_set]
+            self.free = retired
@@ -0,0 +1,115 @@
+import numpy as np
+from constants import NETWORK_REWIRE_PROBABILITY
+
+# Supported graph generators
+NETWORK_KINDS = ("small_world", "scale_free", "random")
+
+class SocialNetwork:
+    """Undirected social network over EV owners, stored as a sparse edge list.
+    
+    The adjacency matrix is kept in coordinate form (one entry per direction
+    of every edge), so the yearly peer signal is a single sparse
+    matrix-vector product done with np.bincount, and owners joining the fleet
+    are attached by appending edges rather than rebuilding the graph. Each
+    owner brings mean_degree // 2 links when it joins:
+    
+    - "small_world": links to the owners who joined just before it, each
+      rewired to a random owner with probability `rewire_probability`
+      (a Watts-Strogatz lattice in join order).
+    - "scale_free": links to owners chosen in proportion to their degree
+      (Barabasi-Albert preferential attachment, applied in batches).
+    - "random": links to owners chosen uniformly at random.
+    
+    Repeated links between the same pair are kept and count as extra weight.
+    """
+    
+    def __init__(self, kind, size, mean_degree, rng, rewire_probability=NETWORK_REWIRE_PROBABILITY):
+        if kind not in NETWORK_KINDS:
+            raise ValueError(f"Unknown social network: {kind!r}")
+        self.kind = kind
+        self.links_per_owner = max(1, mean_degree // 2)
+        self.rng = rng
+        self.rewire_probability = rewire_probability
+        
+        self.size = 0
+        self.edges = 0
+        self.source = np.zeros(16, dtype=np.int64)
+        self.target = np.zeros(16, dtype=np.int64)
+        self.degree = np.zeros(16, dtype=np.float64)
+        
+        self.add_nodes(size)
+    
+    def add_nodes(self, count):
+        """Attach `count` new owners to the existing network."""
+        if self.kind != "scale_free":
+            self._attach(count)
+            return
+        
+        # Preferential attachment in batches no larger than the current
+        # network, so each batch sees a reasonably fresh degree distribution
+        while count > 0:
+            batch = min(count, max(self.size, self.links_per_owner + 1))
+            self._attach(batch)
+            count -= batch
+    
+    def _attach(self, count):
+        """Add `count` owners and their links in one vectorized batch."""
+        if count <= 0:
+            return
+        first = self.size
+        total = first + count
+        if len(self.degree) < total:
+            degree = np.zeros(max(total, 2 * len(self.degree)))
+            degree[:self.size] = self.degree[:self.size]
+            self.degree = degree
+        self.size = total
+        
+        nodes = np.repeat(np.arange(first, total), self.links_per_owner)
+        offsets = np.tile(np.arange(1, self.links_per_owner + 1), count)
+        
+        if self.kind == "random":
+            targets = self.random_other(nodes, total)
+        elif self.kind == "scale_free" and self.edges > 0:
+            # Edge endpoints are sampled in proportion to node degree
+            targets = self.target[self.rng.integers(0, self.edges, size=nodes.size)]
+        else:
+            # Lattice links to the previous owners in join order (this also
+            # seeds the scale-free network), some rewired for a small world
+            targets = nodes - offsets
+            if self.kind == "small_world":
+                rewired = self.rng.random(nodes.size) < self.rewire_probability
+                targets[rewired] = self.random_other(nodes[rewired], total)
+        
+        linked = targets >= 0
+        self.add_edges(nodes[linked], targets[linked])
+    
+    def random_other(self, nodes, total):
+        """A uniformly random owner in [0, total) for each node, never the node itself."""
+        if total < 2:
+            return np.full(nodes.size, -1, dtype=np.int64)
+        targets = self.rng.integers(0, total - 1, size=nodes.size)
+        return targets + (targets >= nodes)
+    
+    def add_edges(self, a, b):
+        """Add undirected edges a[i]-b[i], stored once in each direction."""
+        needed = self.edges + 2 * a.size
+        if needed > len(self.source):
+            capacity = max(needed, 2 * len(self.source))
+            for name in ("source", "target"):
+                old = getattr(self, name)
+                new = np.zeros(capacity, dtype=np.int64)
+                new[:self.edges] = old[:self.edges]
+                setattr(self, name, new)
+        
+        new = slice(self.edges, needed)
+        self.source[new] = np.concatenate([a, b])
+        self.target[new] = np.concatenate([b, a])
+        self.edges = needed
+        self.degree[:self.size] += np.bincount(self.source[new], minlength=self.size)
+    
+    def neighbour_fraction(self, active):
+        """Fraction of each owner's neighbours for which `active` is true."""
+        source = self.source[:self.edges]
+        target = self.target[:self.edges]
+        active_links = np.bincount(target, weights=active[source], minlength=self.size)
+        return active_links / np.maximum(self.degree[:self.size], 1)
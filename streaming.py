@@ -0,0 +1,80 @@
+from typing import NamedTuple
+import pandas as pd
+
+class YearRecord(NamedTuple):
+    """One simulated year's results, as the DataCollector would record them."""
+    year: int
+    number_of_evs: int
+    recycling_efficiency: float
+    total_lithium_demand: float
+    total_cobalt_demand: float
+    recycled_lithium: float
+    recycled_cobalt: float
+    new_lithium_required: float
+    new_cobalt_required: float
+    recycling_backlog: int
+    production_backlog: int
+    
+    @classmethod
+    def from_model(cls, model):
+        """Read the current state of a model that has just finished a step."""
+        return cls(
+            year=model.current_year,
+            number_of_evs=model.num_ev_owners,
+            recycling_efficiency=model.recycling_efficiency,
+            total_lithium_demand=model.calculate_lithium_demand(),
+            total_cobalt_demand=model.calculate_cobalt_demand(),
+            recycled_lithium=model.total_lithium_recycled,
+            recycled_cobalt=model.total_cobalt_recycled,
+            new_lithium_required=model.new_lithium_required,
+            new_cobalt_required=model.new_cobalt_required,
+            recycling_backlog=model.recycling_backlog,
+            production_backlog=model.production_backlog,
+        )
+
+# DataCollector column name for each YearRecord field
+RECORD_COLUMNS = {
+    "year": "Year",
+    "number_of_evs": "Number of EVs",
+    "recycling_efficiency": "Recycling Efficiency",
+    "total_lithium_demand": "Total Lithium Demand",
+    "total_cobalt_demand": "Total Cobalt Demand",
+    "recycled_lithium": "Recycled Lithium",
+    "recycled_cobalt": "Recycled Cobalt",
+    "new_lithium_required": "New Lithium Required",
+    "new_cobalt_required": "New Cobalt Required",
+    "recycling_backlog": "Recycling Backlog",
+    "production_backlog": "Production Backlog",
+}
+
+def stream_years(model):
+    """Step `model` until it stops, yielding a YearRecord after every year.
+    
+    The consumer can stop the run at any point by leaving the loop (or
+    closing the generator); no further years are simulated. The model keeps
+    whatever history its own data collector keeps, and the profile of an
+    instrumented model is exported when the stream ends.
+    """
+    try:
+        while model.running:
+            model.step()
+            yield YearRecord.from_model(model)
+    finally:
+        model.instrumentation.flush()
+
+def stream_model(params=None, keep_history=False):
+    """Build a model from `params` and stream its years (see stream_years).
+    
+    Without `keep_history` the model collects no data of its own, so memory
+    stays constant however long the run is.
+    """
+    from model import EVBatteryModel
+    
+    params = dict(params or {})
+    if not keep_history:
+        params["data_collector"] = "none"
+    yield from stream_years(EVBatteryModel(**params))
+
+def records_dataframe(records):
+    """Collect YearRecords into a DataFrame with the DataCollector's column names."""
+    return pd.DataFrame.from_records(records, columns=YearRecord._fields).rename(columns=RECORD_COLUMNS)
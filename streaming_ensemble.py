@@ -0,0 +1,188 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from constants import (
+    SCENARIOS,
+    RESERVOIR_SIZE,
+    MIN_REPLICATIONS,
+    MAX_REPLICATIONS
+)
+from ensemble import replication_seed
+
+class StreamingStatistics:
+    """Per-year running mean, variance and quantiles of model results across replications.
+    
+    Means and variances are updated with Welford's algorithm. Quantiles come
+    from a fixed-size reservoir sample of replications, so memory does not
+    grow with the number of replications.
+    """
+    
+    def __init__(self, reservoir_size=RESERVOIR_SIZE, seed=None):
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.columns = None
+        self.index = None
+        self.mean = None
+        self.m2 = None
+        self.reservoir = None
+    
+    def update(self, results):
+        """Fold one replication's DataCollector frame into the statistics."""
+        numeric = results.select_dtypes("number")
+        values = numeric.to_numpy(dtype=np.float64)
+        if self.mean is None:
+            self.columns = numeric.columns
+            self.index = numeric.index
+            self.mean = np.zeros_like(values)
+            self.m2 = np.zeros_like(values)
+            self.reservoir = np.empty((self.reservoir_size,) + values.shape)
+        elif values.shape != self.mean.shape:
+            raise ValueError("All replications must cover the same years and columns")
+        
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        
+        # Reservoir sampling keeps a uniform sample of replications
+        if self.count <= self.reservoir_size:
+            self.reservoir[self.count - 1] = values
+        else:
+            slot = self.rng.integers(0, self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = values
+    
+    def frame(self, values):
+        return pd.DataFrame(values, index=self.index, columns=self.columns)
+    
+    def get_mean(self):
+        return self.frame(self.mean)
+    
+    def get_variance(self):
+        """Sample variance per year and column (zero with fewer than two replications)."""
+        return self.frame(self.m2 / max(self.count - 1, 1))
+    
+    def get_quantile(self, q):
+        """Approximate quantile `q` per year and column, from the reservoir sample."""
+        sample = self.reservoir[:min(self.count, self.reservoir_size)]
+        return self.frame(np.quantile(sample, q, axis=0))
+
+class RunningMetric:
+    """Running mean and confidence interval of one scalar per replication."""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def half_width(self, confidence):
+        """Half-width of the normal-approximation confidence interval on the mean."""
+        if self.count < 2:
+            return float("inf")
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * (self.m2 / (self.count - 1) / self.count) ** 0.5
+
+def lithium_reduction(results):
+    """Final-year lithium demand reduction from recycling, as in analyze_results."""
+    from run import demand_reduction
+    return demand_reduction(results, "New Lithium Required")
+
+def cobalt_reduction(results):
+    """Final-year cobalt demand reduction from recycling, as in analyze_results."""
+    from run import demand_reduction
+    return demand_reduction(results, "New Cobalt Required")
+
+DEFAULT_METRICS = {
+    "lithium_reduction": lithium_reduction,
+    "cobalt_reduction": cobalt_reduction,
+}
+
+def run_replication_set(task):
+    """Run every scenario for one replication and return {name: results}."""
+    from run import run_model
+    
+    scenarios, replication, seed = task
+    return {
+        name: run_model({**params, "seed": replication_seed(seed, name, replication)}, verbose=False)
+        for name, params in scenarios
+    }
+
+def run_until_precise(scenarios=SCENARIOS, metrics=None, tolerance=1.0, confidence=0.95,
+                      min_replications=MIN_REPLICATIONS, max_replications=MAX_REPLICATIONS,
+                      seed=0, workers=None, verbose=True):
+    """Run replications until every metric's confidence interval is tight enough.
+    
+    A replication runs all scenarios with the same seeds run_ensemble would
+    use. Each metric maps one replication's {scenario: results} to a scalar
+    (by default the final-year lithium and cobalt reductions). Replications
+    stop being launched once every metric's confidence half-width is at most
+    `tolerance`. Results are folded in replication order, so the outcome
+    for a given seed does not depend on the number of workers; replications
+    still in flight when the rule is met are discarded.
+    """
+    metrics = DEFAULT_METRICS if metrics is None else metrics
+    if not metrics:
+        raise ValueError("At least one metric is needed to decide when to stop")
+    statistics = {name: StreamingStatistics(seed=seed) for name, _ in scenarios}
+    running = {name: RunningMetric() for name in metrics}
+    
+    def converged():
+        return all(metric.count >= min_replications and metric.half_width(confidence) <= tolerance
+                   for metric in running.values())
+    
+    def fold(results):
+        for name, frame in results.items():
+            statistics[name].update(frame)
+        for name, function in metrics.items():
+            running[name].update(function(results))
+        if verbose:
+            summary = ", ".join(f"{name} {metric.mean:.2f} ± {metric.half_width(confidence):.2f}"
+                                for name, metric in running.items())
+            print(f"  Replication {next(iter(running.values())).count}: {summary}")
+    
+    done = 0
+    if workers == 1:
+        while done < max_replications and not converged():
+            fold(run_replication_set((scenarios, done, seed)))
+            done += 1
+    else:
+        slots = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=slots) as executor:
+            pending = {}
+            finished = {}
+            launched = 0
+            while done < max_replications and not converged():
+                # Keep every worker busy with the next replications in order
+                while launched < max_replications and len(pending) < slots:
+                    future = executor.submit(run_replication_set, (scenarios, launched, seed))
+                    pending[future] = launched
+                    launched += 1
+                
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    finished[pending.pop(future)] = future.result()
+                
+                # Fold finished replications strictly in order
+                while done in finished and not converged():
+                    fold(finished.pop(done))
+                    done += 1
+            
+            for future in pending:
+                future.cancel()
+    
+    return {
+        "replications": done,
+        "converged": converged(),
+        "metrics": {name: (metric.mean, metric.half_width(confidence)) for name, metric in running.items()},
+        "statistics": statistics,
+    }
@@ -0,0 +1,15 @@
+from benchmark import METRICS, find_regressions, run_case
+
+def test_run_case_times_several_runs():
+    params = {"owner_backend": "cohort", "end_year": 2030, "seed": 0}
+    result = run_case(params, min_runs=3, min_seconds=0)
+    assert result["runs"] == 3
+    assert all(result[metric] is not None for metric in METRICS if metric != "peak_rss_mb")
+
+def test_find_regressions_respects_direction_and_tolerance():
+    baseline = {"case": {"steps_per_sec": 100.0, "allocated_blocks_per_year": 10.0}}
+    assert find_regressions({"case": {"steps_per_sec": 85.0, "allocated_blocks_per_year": 5.0}}, baseline) == []
+    assert find_regressions({"case": {"steps_per_sec": 70.0, "allocated_blocks_per_year": 13.0}}, baseline) == [
+        ("case", "steps_per_sec", 100.0, 70.0),
+        ("case", "allocated_blocks_per_year", 10.0, 13.0),
+    ]
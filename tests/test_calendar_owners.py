@@ -0,0 +1,9 @@
+import pytest
+from run import run_model
+
+@pytest.mark.parametrize("seed", range(3))
+def test_calendar_reproduces_vectorized_with_a_fixed_lifespan(seed):
+    params = {"seed": seed, "end_year": 2060, "battery_lifespan_years": 6, "owner_recycling_probability": 0.3}
+    vectorized = run_model({**params, "owner_backend": "vectorized"}, verbose=False)
+    calendar = run_model({**params, "owner_backend": "calendar"}, verbose=False)
+    assert calendar.equals(vectorized)
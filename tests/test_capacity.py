@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from model import OWNER_BACKENDS
+from run import run_model
+
+UNLIMITED = 10 ** 9
+
+@pytest.mark.parametrize("backend", OWNER_BACKENDS)
+@pytest.mark.parametrize("capacities", [
+    {"recycler_capacity": UNLIMITED},
+    {"manufacturer_capacity": UNLIMITED},
+    {"recycler_capacity": UNLIMITED, "manufacturer_capacity": UNLIMITED},
+])
+def test_non_binding_capacity_matches_unlimited(backend, capacities):
+    params = {"owner_backend": backend, "seed": 3, "end_year": 2040}
+    unlimited = run_model(params, verbose=False)
+    limited = run_model({**params, **capacities}, verbose=False)
+    
+    assert (limited.filter(like="Backlog") == 0).all().all()
+    limited = limited.drop(columns=limited.filter(like="Backlog").columns)
+    np.testing.assert_allclose(limited.to_numpy(), unlimited.to_numpy(), rtol=1e-12)
@@ -0,0 +1,39 @@
+import pytest
+from checkpoint import checkpoint, checkpoint_at, fork, restore, run_branches
+from model import EVBatteryModel, OWNER_BACKENDS
+from run import run_model, run_until_done
+
+FORK_YEAR = 2035
+
+def params(backend):
+    return {"seed": 3, "end_year": 2045, "owner_backend": backend}
+
+@pytest.mark.parametrize("backend", OWNER_BACKENDS)
+def test_a_resumed_checkpoint_reproduces_a_straight_run(backend):
+    straight = run_model(params(backend), verbose=False)
+    resumed = run_until_done(restore(checkpoint_at(params(backend), FORK_YEAR)), verbose=False)
+    assert resumed.equals(straight)
+
+@pytest.mark.parametrize("backend", OWNER_BACKENDS)
+def test_a_fork_only_changes_the_years_after_it(backend):
+    straight = run_model(params(backend), verbose=False)
+    snapshot = checkpoint_at(params(backend), FORK_YEAR)
+    branches = run_branches(snapshot, [("same", {}), ("higher", {"owner_recycling_probability": 0.9})],
+                            workers=1)
+    
+    assert branches["same"].equals(straight)
+    higher = branches["higher"]
+    prefix = straight["Year"] <= FORK_YEAR
+    assert higher[prefix].equals(straight[prefix])
+    assert (higher[~prefix]["Recycled Lithium"] > straight[~prefix]["Recycled Lithium"]).all()
+
+def test_forking_an_unforkable_parameter_raises():
+    snapshot = checkpoint_at(params("vectorized"), FORK_YEAR)
+    with pytest.raises(ValueError, match="cannot be changed"):
+        fork(snapshot, {"initial_ev_owners": 10})
+    with pytest.raises(ValueError, match="battery lifespan"):
+        fork(checkpoint_at(params("cohort"), FORK_YEAR), {"battery_lifespan_years": 6})
+
+def test_instrumented_models_cannot_be_checkpointed():
+    with pytest.raises(ValueError, match="Instrumented"):
+        checkpoint(EVBatteryModel(instrument=True))
@@ -0,0 +1,44 @@
+import json
+import os
+import pytest
+from model import EVBatteryModel
+from run import run_model, run_until_done
+
+# Results of each backend recorded before common random numbers existed
+with open(os.path.join(os.path.dirname(__file__), "reference_before_common_random_numbers.json")) as f:
+    REFERENCE = json.load(f)
+
+# Backends that support common random numbers
+PAIRED_BACKENDS = ["agents", "slotted", "vectorized", "calendar"]
+
+def run_audit(params):
+    """The ledger's yearly audit trail of one run."""
+    model = EVBatteryModel(**params)
+    run_until_done(model, verbose=False)
+    return model.ledger.get_audit_dataframe()
+
+@pytest.mark.parametrize("name", sorted(REFERENCE))
+def test_results_are_unchanged_bit_for_bit(name):
+    """Results recorded before common random numbers existed, with the option off."""
+    reference = REFERENCE[name]
+    results = run_model({**reference["params"], "seed": 5, "end_year": 2045, "common_random_numbers": False},
+                        verbose=False)
+    assert list(results.columns) == reference["columns"]
+    assert results.to_numpy().tolist() == reference["values"]
+
+@pytest.mark.parametrize("backend", PAIRED_BACKENDS)
+@pytest.mark.parametrize("seed", range(3))
+def test_common_random_numbers_pair_owner_decisions(backend, seed):
+    # Several recyclers, so that company choices draw random numbers too
+    params = {"owner_backend": backend, "seed": seed, "end_year": 2045, "initial_recycling_companies": 3,
+              "common_random_numbers": True}
+    low, high = (run_audit({**params, "owner_recycling_probability": probability}) for probability in (0.5, 0.52))
+    
+    # The same batteries reach end of life in both scenarios, and every owner
+    # that recycles at 0.5 sees the same uniform at 0.52 and recycles too
+    assert (high["Batteries Produced"] == low["Batteries Produced"]).all()
+    assert (high["Batteries Recycled"] >= low["Batteries Recycled"]).all()
+
+def test_common_random_numbers_are_rejected_by_the_cohort_backend():
+    with pytest.raises(ValueError, match="cohort"):
+        EVBatteryModel(owner_backend="cohort", common_random_numbers=True)
@@ -0,0 +1,42 @@
+import pstats
+from itertools import islice
+from model import EVBatteryModel
+from results_cache import ResultCache
+from run import run_model
+from streaming import stream_years
+
+PARAMS = {"seed": 1, "end_year": 2035, "instrument": True}
+
+def test_instrumented_runs_record_phase_times_and_call_counts(tmp_path):
+    profile = tmp_path / "run.prof"
+    results = run_model({**PARAMS, "profile_path": str(profile)}, verbose=False)
+    table = results.attrs["instrumentation"]
+    
+    assert len(table) == len(results) - 1  # One row per simulated year
+    for phase in ("Schedule", "Settle", "Growth", "Collect"):
+        assert (table[f"{phase} Time (s)"] >= 0).all()
+    assert (table["Step Time (s)"] > 0).all()
+    assert (table["EVOwner.step Calls"] == table["Number of EVs"].shift(fill_value=1000)).all()
+    assert (table["RecyclingCompany.receive_battery Calls"] > 0).any()
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+def test_the_profile_is_written_when_a_stream_stops_early(tmp_path):
+    profile = tmp_path / "stream.prof"
+    model = EVBatteryModel(**PARAMS, profile_path=str(profile))
+    stream = stream_years(model)
+    assert len(list(islice(stream, 3))) == 3
+    stream.close()
+    
+    assert model.running
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+def test_instrumented_runs_are_measured_on_a_cache_hit(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = run_model(PARAMS, verbose=False, cache=cache)
+    second = run_model(PARAMS, verbose=False, cache=cache)
+    
+    assert second.equals(first)
+    calls = first.attrs["instrumentation"].filter(like="Calls")
+    assert second.attrs["instrumentation"].filter(like="Calls").equals(calls)
+    # The same results without instrumentation are served from the cache
+    assert cache.get({key: value for key, value in PARAMS.items() if key != "instrument"}).equals(first)
@@ -0,0 +1,45 @@
+import os
+import job_queue
+from ensemble import run_ensemble
+from job_queue import WorkQueue, create_job, work
+
+SCENARIOS = [
+    ("baseline", {"owner_backend": "vectorized", "end_year": 2030}),
+    ("high_efficiency", {"owner_backend": "vectorized", "end_year": 2030,
+                         "recycling_efficiency_start": 0.8}),
+]
+
+def test_merged_job_matches_run_ensemble(tmp_path):
+    create_job(tmp_path, SCENARIOS, replications=3, seed=7, shard_size=2)
+    assert work(tmp_path, verbose=False, poll_seconds=0.01) == 3
+    
+    frames = WorkQueue(tmp_path).merge()
+    expected = run_ensemble(SCENARIOS, 3, seed=7, workers=1)
+    assert len(frames) == len(expected)
+    for frame, run in zip(frames, expected):
+        assert frame.equals(run)
+
+def test_expired_leases_are_reclaimed(tmp_path):
+    queue = create_job(tmp_path, SCENARIOS, replications=1, seed=7, shard_size=1)
+    
+    # Shard 0 is held by a live worker, shard 1 by one that stopped renewing
+    for shard in (0, 1):
+        open(queue.lease_path(shard, 0), "w").close()
+    os.utime(queue.lease_path(1, 0), (0, 0))
+    assert queue.status() == {"done": 0, "leased": 1, "pending": 1}
+    
+    shard, path = queue.claim("worker")
+    assert (shard, path) == (1, queue.lease_path(1, 1))
+    assert queue.claim("another worker") is None
+
+def test_a_poll_lists_each_directory_once(tmp_path, monkeypatch):
+    queue = create_job(tmp_path, SCENARIOS, replications=20, seed=7, shard_size=1)
+    for shard in range(queue.shards):
+        open(queue.lease_path(shard, 0), "w").close()
+    
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(job_queue.os, "listdir", lambda path: listings.append(path) or listdir(path))
+    assert queue.claim("worker") is None
+    queue.status()
+    assert len(listings) == 4
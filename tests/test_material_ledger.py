@@ -0,0 +1,37 @@
+import json
+import os
+import numpy as np
+import pytest
+from model import EVBatteryModel
+from run import run_model, run_until_done
+
+# Results of each backend recorded before the ledger replaced per-battery bookkeeping
+with open(os.path.join(os.path.dirname(__file__), "reference_before_ledger.json")) as f:
+    REFERENCE = json.load(f)
+
+RUN = {"seed": 5, "end_year": 2045}
+
+@pytest.mark.parametrize("name", sorted(REFERENCE))
+def test_ledger_reproduces_results_from_before_it(name):
+    """The batched ledger only changes rounding, not results."""
+    reference = REFERENCE[name]
+    results = run_model({**reference["params"], **RUN}, verbose=False)
+    assert list(results.columns) == reference["columns"]
+    np.testing.assert_allclose(results.to_numpy(dtype=np.float64), reference["values"], rtol=1e-12)
+
+@pytest.mark.parametrize("backend", ["agents", "slotted", "vectorized", "cohort", "calendar"])
+def test_ledger_totals_balance(backend):
+    model = EVBatteryModel(owner_backend=backend, **RUN)
+    run_until_done(model, verbose=False)
+    ledger = model.ledger
+    audit = ledger.get_audit_dataframe()
+    
+    recycled = sum(recycler.materials_recycled for recycler in model.recyclers)
+    np.testing.assert_allclose(ledger.total_recycled, recycled, rtol=1e-12)
+    for i, material in enumerate(ledger.materials):
+        name = material.capitalize()
+        needed = ledger.per_battery[i] * audit["Batteries Produced"].sum()
+        supplied = audit[f"{name} Used From Recycled"].sum() + audit[f"New {name} Required"].sum()
+        np.testing.assert_allclose(supplied, needed, rtol=1e-12)
+        np.testing.assert_allclose(ledger.total_recycled[i] - ledger.total_used_from_recycled[i],
+                                   ledger.pool[i], rtol=1e-9, atol=1e-9)
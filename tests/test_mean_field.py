@@ -0,0 +1,13 @@
+import numpy as np
+from mean_field import solve, validate
+from run import run_model
+
+def test_fleet_follows_the_model_growth_schedule():
+    params = {"end_year": 2040, "ev_growth_rates": {"2024-2030": 0.2, "2031-2035": 0.05, "2036-2050": 0.1}}
+    expected = solve(params)["Number of EVs"].to_numpy()
+    simulated = run_model({**params, "owner_backend": "cohort", "seed": 1}, verbose=False)
+    np.testing.assert_array_equal(expected, simulated["Number of EVs"].to_numpy())
+
+def test_mean_field_agrees_with_abm_ensembles():
+    comparison = validate({"owner_backend": "vectorized", "end_year": 2050}, replications=30, seed=3, workers=1)
+    assert comparison["Z"].abs().mean() < 2
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from constants import REGIONS
+from regional_model import GLOBAL, RegionalModel, regional_summary
+
+# The default regions, over a short horizon
+SMALL_REGIONS = [(name, {**params, "end_year": 2032}) for name, params in REGIONS]
+
+@pytest.fixture(scope="module")
+def serial_results():
+    return RegionalModel(SMALL_REGIONS, seed=0, parallel=False).run()
+
+def test_net_imports_sum_to_zero_every_year(serial_results):
+    regions = [name for name, _ in SMALL_REGIONS]
+    for material in ("Lithium", "Cobalt"):
+        column = f"Net {material} Imports"
+        net = sum(serial_results[name][column] for name in regions)
+        np.testing.assert_allclose(net, 0, atol=1e-9)
+        assert (serial_results[GLOBAL][column] == 0).all()
+        assert serial_results[regions[0]][column].abs().sum() > 0
+
+def test_parallel_and_serial_runs_are_identical(serial_results):
+    parallel = RegionalModel(SMALL_REGIONS, seed=0, parallel=True).run()
+    assert list(parallel) == list(serial_results)
+    for name, frame in serial_results.items():
+        assert parallel[name].equals(frame)
+
+def test_the_summary_has_world_net_imports(serial_results):
+    summary = regional_summary(serial_results).set_index("Region")
+    assert not summary.isna().any().any()
+    assert summary.loc[GLOBAL, "Cumulative Net Lithium Imports"] == 0
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_region_errors_are_raised_in_the_coordinator(parallel):
+    regions = SMALL_REGIONS[:-1] + [("Broken", {"end_year": 2032, "owner_backend": "unknown"})]
+    with pytest.raises(RuntimeError, match="A region worker failed"):
+        RegionalModel(regions, seed=0, parallel=parallel).run()
@@ -0,0 +1,51 @@
+import os
+from results_cache import ResultCache
+from run import run_model
+
+PARAMS = {"seed": 3, "end_year": 2035, "owner_backend": "vectorized"}
+
+def test_a_second_run_is_served_from_the_cache(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    results = run_model(PARAMS, verbose=False, cache=cache)
+    
+    import run
+    monkeypatch.setattr(run, "EVBatteryModel", None)  # A hit must not build a model
+    cached = run_model(PARAMS, verbose=False, cache=cache)
+    assert cached.equals(results)
+
+def test_keys_change_with_parameters_but_not_output_settings(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    run_model(PARAMS, verbose=False, cache=cache)
+    
+    assert cache.get({**PARAMS, "owner_recycling_probability": 0.4}) is None
+    assert cache.get({**PARAMS, "seed": 4}) is None
+    assert cache.get({**PARAMS, "collector_path": str(tmp_path / "collector")}) is not None
+    assert cache.key({**PARAMS, "instrument": True}) == cache.key(PARAMS)
+
+def test_unseeded_runs_are_not_cached(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    run_model({**PARAMS, "seed": None}, verbose=False, cache=cache)
+    assert cache.entries() == []
+
+def test_eviction_keeps_the_most_recently_used_runs(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for seed in range(3):
+        run_model({**PARAMS, "seed": seed}, verbose=False, cache=cache)
+        os.utime(cache.path(cache.key({**PARAMS, "seed": seed})), (seed, seed))
+    cache.get({**PARAMS, "seed": 0})
+    
+    sizes = sorted(size for _, size, _ in cache.entries())
+    cache.max_bytes = sizes[-1] + sizes[-2]
+    cache.evict()
+    assert cache.get({**PARAMS, "seed": 1}) is None
+    assert cache.get({**PARAMS, "seed": 0}) is not None
+    assert cache.get({**PARAMS, "seed": 2}) is not None
+
+def test_eviction_skips_entries_removed_by_another_process(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    run_model(PARAMS, verbose=False, cache=cache)
+    entries = cache.entries()
+    os.remove(entries[0][0])
+    monkeypatch.setattr(cache, "entries", lambda: entries)
+    cache.max_bytes = 0
+    cache.evict()
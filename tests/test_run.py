@@ -0,0 +1,36 @@
+import pytest
+from model import EVBatteryModel
+from run import run_model, run_until_done
+
+def test_run_model_rejects_models_without_a_collector():
+    with pytest.raises(ValueError, match="stream_model"):
+        run_model({"data_collector": "none", "end_year": 2030}, verbose=False)
+    
+    model = EVBatteryModel(data_collector="none", end_year=2030)
+    with pytest.raises(ValueError, match="stream_years"):
+        run_until_done(model, verbose=False)
+    assert model.current_year == model.start_year  # Rejected before simulating
+
+def test_main_shuts_reporting_down_when_a_run_fails(tmp_path, monkeypatch):
+    import json
+    import reporting
+    from run import main
+    
+    pipelines = []
+    original_init = reporting.ReportingPipeline.__init__
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        pipelines.append(self)
+    monkeypatch.setattr(reporting.ReportingPipeline, "__init__", init)
+    
+    scenarios = tmp_path / "scenarios.json"
+    scenarios.write_text(json.dumps({
+        "baseline": {"end_year": 2030, "owner_backend": "cohort"},
+        "broken": {"end_year": 2030, "owner_backend": "unknown"},
+    }))
+    with pytest.raises(ValueError, match="Unknown owner backend"):
+        main(["--scenarios", str(scenarios), "--no-cache", "--report-dir", str(tmp_path),
+              "--figure", str(tmp_path / "comparison.png")])
+    
+    with pytest.raises(RuntimeError):
+        pipelines[0].executor.submit(print)
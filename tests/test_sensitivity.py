@@ -0,0 +1,27 @@
+from sensitivity import SENSITIVITY_PARAMETERS, morris_analysis, sobol_analysis
+
+PARAMETERS = {name: SENSITIVITY_PARAMETERS[name] for name in ("owner_recycling_probability", "lithium_per_battery")}
+BASE_PARAMS = {"owner_backend": "vectorized", "end_year": 2032}
+
+def test_morris_screening_is_deterministic_for_a_seed():
+    run = dict(parameters=PARAMETERS, trajectories=4, base_params=BASE_PARAMS, seed=1, workers=1, bootstrap=20)
+    result = morris_analysis(**run)
+    
+    assert list(result.columns) == ["Output", "Parameter", "mu", "mu_star", "sigma", "mu_star_conf"]
+    assert len(result) == 2 * len(PARAMETERS)
+    assert result.equals(morris_analysis(**run))
+    # Lithium per battery has no effect on cobalt
+    effects = result.set_index(["Output", "Parameter"])["mu_star"]
+    assert effects["Cumulative New Cobalt", "lithium_per_battery"] == 0
+    assert effects["Cumulative New Lithium", "lithium_per_battery"] > 0
+
+def test_sobol_indices_are_deterministic_for_a_seed():
+    run = dict(parameters=PARAMETERS, samples=8, base_params=BASE_PARAMS, seed=1, workers=1, bootstrap=20)
+    result = sobol_analysis(**run)
+    
+    assert list(result.columns) == ["Output", "Parameter", "S1", "S1_conf", "ST", "ST_conf"]
+    assert len(result) == 2 * len(PARAMETERS)
+    assert result.equals(sobol_analysis(**run))
+    indices = result.set_index(["Output", "Parameter"])
+    assert indices.loc[("Cumulative New Cobalt", "lithium_per_battery"), "ST"] == 0
+    assert indices.loc[("Cumulative New Lithium", "lithium_per_battery"), "ST"] > 0
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from social_network import NETWORK_KINDS, SocialNetwork
+
+def dense_adjacency(network):
+    """Adjacency matrix of a network, with repeated links adding weight."""
+    adjacency = np.zeros((network.size, network.size))
+    np.add.at(adjacency, (network.source[:network.edges], network.target[:network.edges]), 1)
+    return adjacency
+
+@pytest.mark.parametrize("kind", NETWORK_KINDS)
+def test_networks_are_undirected_edge_lists_with_the_mean_degree(kind):
+    network = SocialNetwork(kind, 1000, 6, np.random.default_rng(0))
+    network.add_nodes(500)  # Owners joining the fleet later
+    adjacency = dense_adjacency(network)
+    
+    assert network.size == 1500
+    assert (adjacency == adjacency.T).all()
+    assert (np.diag(adjacency) == 0).all()
+    np.testing.assert_array_equal(network.degree[:network.size], adjacency.sum(axis=1))
+    # Every owner brings 3 links, except the first few of a lattice
+    if kind == "random":
+        assert network.degree[:network.size].mean() == 6
+    else:
+        assert 6 - 12 / network.size <= network.degree[:network.size].mean() <= 6
+
+def test_scale_free_networks_have_hubs():
+    rng = np.random.default_rng(0)
+    scale_free = SocialNetwork("scale_free", 2000, 6, rng).degree[:2000]
+    random = SocialNetwork("random", 2000, 6, rng).degree[:2000]
+    assert scale_free.max() > 3 * random.max()
+
+@pytest.mark.parametrize("kind", NETWORK_KINDS)
+def test_neighbour_fraction_matches_a_dense_matrix_product(kind):
+    network = SocialNetwork(kind, 40, 4, np.random.default_rng(1))
+    active = np.random.default_rng(2).random(network.size) < 0.4
+    adjacency = dense_adjacency(network)
+    expected = adjacency @ active / np.maximum(adjacency.sum(axis=1), 1)
+    np.testing.assert_allclose(network.neighbour_fraction(active.astype(np.float64)), expected, rtol=1e-12)
+
+def test_unknown_networks_are_rejected():
+    with pytest.raises(ValueError, match="Unknown social network"):
+        SocialNetwork("ring", 10, 4, np.random.default_rng(0))
@@ -0,0 +1,38 @@
+from constants import MIN_REPLICATIONS
+from streaming_ensemble import run_until_precise
+
+SCENARIOS = [
+    ("baseline", {"owner_backend": "vectorized", "end_year": 2030}),
+    ("no_recycling", {"owner_backend": "vectorized", "end_year": 2030,
+                      "owner_recycling_probability": 0.0,
+                      "recycling_efficiency_start": 0.0,
+                      "recycling_efficiency_growth": 0.0}),
+]
+
+# Loose enough to be met after a few replications beyond the minimum
+TOLERANCE = 4.0
+MAX_REPLICATIONS = 12
+
+def test_run_until_precise_reports_progress(capsys):
+    result = run_until_precise(SCENARIOS, tolerance=TOLERANCE, workers=1, max_replications=MIN_REPLICATIONS - 1)
+    assert result["replications"] == MIN_REPLICATIONS - 1
+    assert not result["converged"]
+    assert "Replication 1:" in capsys.readouterr().out
+
+def test_run_until_precise_stops_once_precise():
+    result = run_until_precise(SCENARIOS, tolerance=TOLERANCE, workers=1, max_replications=MAX_REPLICATIONS,
+                               verbose=False)
+    assert result["converged"]
+    assert MIN_REPLICATIONS < result["replications"] < MAX_REPLICATIONS
+    assert all(half_width <= TOLERANCE for _, half_width in result["metrics"].values())
+
+def test_estimates_do_not_depend_on_the_number_of_workers():
+    serial = run_until_precise(SCENARIOS, tolerance=TOLERANCE, workers=1, max_replications=MAX_REPLICATIONS,
+                               verbose=False)
+    parallel = run_until_precise(SCENARIOS, tolerance=TOLERANCE, workers=2,
+                                 max_replications=MAX_REPLICATIONS, verbose=False)
+    assert parallel["replications"] == serial["replications"]
+    assert parallel["metrics"] == serial["metrics"]
+    for name, statistics in serial["statistics"].items():
+        assert parallel["statistics"][name].get_mean().equals(statistics.get_mean())
+        assert parallel["statistics"][name].get_variance().equals(statistics.get_variance())
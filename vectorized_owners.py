@@ -0,0 +1,248 @@
+import numpy as np
+from constants import (
+    NETWORK_INFLUENCE_ANNUAL_INCREASE,
+    MAX_NETWORK_INFLUENCE,
+    NETWORK_PEER_INFLUENCE
+)
+
+# Per-owner state arrays kept by VectorizedEVOwners
+STATE_ARRAYS = ("battery_age", "has_recycled", "battery_replaced", "network_influence",
+                "recycled_last_year", "weight", "vehicle_age", "vehicle_lifespan")
+
+def reserve(population, names, capacity):
+    """Grow a population's per-owner arrays (geometrically) to hold at least `capacity` owners.
+    
+    `names` are the attributes holding the arrays; the first
+    `population.size` entries of each are kept.
+    """
+    current = len(getattr(population, names[0]))
+    if capacity <= current:
+        return
+    new_capacity = max(capacity, 2 * current)
+    for name in names:
+        old = getattr(population, name)
+        new = np.zeros(new_capacity, dtype=old.dtype)
+        new[:population.size] = old[:population.size]
+        setattr(population, name, new)
+
+def even_split(total, parts):
+    """Split `total` into `parts` integers that differ by at most one."""
+    return np.full(parts, total // parts, dtype=np.int64) + (np.arange(parts) < total % parts)
+
+class VectorizedEVOwners:
+    """Struct-of-arrays population of EV owners, advanced one year at a time.
+    
+    Mirrors the per-agent behaviour of EVOwner, but keeps every owner's state
+    in NumPy arrays and draws all recycle decisions for a year in one batch.
+    With a SocialNetwork, influence grows with the share of an owner's
+    neighbours who recycled last year instead of by a fixed annual amount.
+    
+    With an `agent_budget`, owners are super-individuals: each entry carries a
+    weight (vehicles represented), decides for all of them at once and sends
+    weight-scaled flows to companies, so totals stay unbiased in expectation.
+    Growth adds entries at the weight needed to stay within the budget; the
+    lightest entries are merged when over budget and the heaviest are split
+    when there is room. A smaller budget means fewer, heavier
+    entries and so noisier (coarser) stochastic outcomes.
+    
+    With vehicle retirement, retired entries are compacted away at the end of
+    the step and their slots in the backing arrays are reused by new owners.
+    """
+    
+    def __init__(self, model, battery_ages=(), rng=None, network=None, agent_budget=None, dispatch_rng=None):
+        self.model = model
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.dispatch_rng = dispatch_rng if dispatch_rng is not None else self.rng
+        self.network = network
+        self.agent_budget = agent_budget
+        
+        # Owner state, one slot per owner entry (only the first `size` are live)
+        capacity = max(len(battery_ages), 16)
+        self.battery_age = np.zeros(capacity, dtype=np.int32)
+        self.has_recycled = np.zeros(capacity, dtype=bool)
+        self.battery_replaced = np.zeros(capacity, dtype=bool)
+        self.network_influence = np.zeros(capacity, dtype=np.float64)
+        self.recycled_last_year = np.zeros(capacity, dtype=bool)
+        self.weight = np.zeros(capacity, dtype=np.int64)
+        self.vehicle_age = np.zeros(capacity, dtype=np.int32)
+        self.vehicle_lifespan = np.zeros(capacity, dtype=np.int32)
+        self.size = 0
+        self.vehicles_retired = 0
+        
+        # Initial owners beyond the budget are represented by a sample of entries
+        weight = 1
+        if agent_budget is not None and len(battery_ages) > agent_budget:
+            weight = even_split(len(battery_ages), agent_budget)
+            battery_ages = battery_ages[:agent_budget]
+        self.append(len(battery_ages), battery_ages, weight)
+    
+    def __len__(self):
+        """Number of vehicles represented."""
+        return int(self.weight[:self.size].sum())
+    
+    def append(self, count, battery_age=0, weight=1):
+        """Append `count` owner entries; age and weight may be scalars or per entry."""
+        if count <= 0:
+            return
+        reserve(self, STATE_ARRAYS, self.size + count)
+        new = slice(self.size, self.size + count)
+        self.battery_age[new] = battery_age
+        self.has_recycled[new] = False
+        self.battery_replaced[new] = False
+        self.network_influence[new] = 0
+        self.recycled_last_year[new] = False
+        self.weight[new] = weight
+        self.vehicle_age[new] = battery_age
+        vehicle_lifespans = self.model.draw_vehicle_lifespans(count)
+        if vehicle_lifespans is not None:
+            self.vehicle_lifespan[new] = vehicle_lifespans
+        self.size += count
+        
+        # Network growth is only attached for owners joining after creation
+        if self.network is not None and self.network.size < self.size:
+            self.network.add_nodes(self.size - self.network.size)
+    
+    def add_owners(self, count, battery_age=0):
+        """Add `count` new vehicles, as super-individuals if there is an agent budget."""
+        if count <= 0:
+            return
+        if self.agent_budget is None:
+            self.append(count, battery_age)
+            return
+        
+        # New vehicles enter at the weight the whole fleet needs to fit the budget
+        target_weight = -(-(len(self) + count) // self.agent_budget)
+        entries = -(-count // target_weight)
+        self.append(entries, battery_age, even_split(count, entries))
+        self.rebalance()
+    
+    def rebalance(self):
+        """Merge entries when over the agent budget, split the heaviest when under."""
+        while self.size > self.agent_budget:
+            self.merge_lightest(self.size - self.agent_budget)
+        if self.size < self.agent_budget:
+            self.split_heaviest(self.agent_budget - self.size)
+    
+    def keep(self, indices):
+        """Compact the arrays down to the entries at `indices`."""
+        for name in STATE_ARRAYS:
+            array = getattr(self, name)
+            array[:len(indices)] = array[indices]
+        self.size = len(indices)
+    
+    def merge_lightest(self, excess):
+        """Merge up to `excess` pairs drawn from the lightest entries.
+        
+        Merging light entries keeps weights even across the population, and
+        pairing them in battery-age/influence order joins entries in the
+        same (or the closest) state. The merged entry keeps one partner's
+        state, chosen with probability proportional to its weight, so
+        expected totals are unchanged.
+        """
+        pairs = min(excess, self.size // 2)
+        weight = self.weight[:self.size]
+        lightest = np.argpartition(weight, 2 * pairs - 1)[:2 * pairs]
+        order = lightest[np.lexsort((self.network_influence[lightest], self.battery_age[lightest]))]
+        a = order[0::2]
+        b = order[1::2]
+        weight_a = self.weight[a]
+        weight_b = self.weight[b]
+        take_b = self.rng.random(pairs) * (weight_a + weight_b) < weight_b
+        survivor = np.where(take_b, b, a)
+        removed = np.where(take_b, a, b)
+        self.weight[survivor] = weight_a + weight_b
+        
+        alive = np.ones(self.size, dtype=bool)
+        alive[removed] = False
+        self.keep(np.flatnonzero(alive))
+    
+    def split_heaviest(self, room):
+        """Split up to `room` of the heaviest entries into two halves."""
+        weight = self.weight[:self.size]
+        candidates = np.flatnonzero(weight >= 2)
+        if candidates.size == 0:
+            return
+        heaviest = candidates[np.argsort(-weight[candidates], kind="stable")[:room]]
+        halves = weight[heaviest] // 2
+        self.weight[heaviest] -= halves
+        
+        reserve(self, STATE_ARRAYS, self.size + heaviest.size)
+        new = slice(self.size, self.size + heaviest.size)
+        for name in STATE_ARRAYS:
+            array = getattr(self, name)
+            array[new] = array[heaviest]
+        self.weight[new] = halves
+        self.size += heaviest.size
+    
+    def step(self):
+        """Advance every owner by one year, mirroring EVOwner.step in bulk."""
+        n = self.size
+        battery_age = self.battery_age[:n]
+        has_recycled = self.has_recycled[:n]
+        battery_replaced = self.battery_replaced[:n]
+        network_influence = self.network_influence[:n]
+        
+        # Reset replacement tracking and age every battery
+        battery_replaced[:] = False
+        battery_age += 1
+        
+        # Network influence grows linearly, or with neighbours' recycling, up to its cap
+        if self.network is None:
+            increase = NETWORK_INFLUENCE_ANNUAL_INCREASE
+        else:
+            increase = NETWORK_PEER_INFLUENCE * self.network.neighbour_fraction(self.recycled_last_year[:n])
+            self.recycled_last_year[:n] = False
+        np.minimum(network_influence + increase, MAX_NETWORK_INFLUENCE, out=network_influence)
+        
+        # Owners whose batteries reached end of life this year, and retiring vehicles
+        end_of_life = (battery_age >= self.model.battery_lifespan) & ~has_recycled
+        retiring = None
+        if self.model.vehicle_lifespan is not None:
+            self.vehicle_age[:n] += 1
+            retiring = self.vehicle_age[:n] >= self.vehicle_lifespan[:n]
+            end_of_life |= retiring
+        end_of_life = np.flatnonzero(end_of_life)
+        self.vehicles_retired = 0
+        if end_of_life.size == 0:
+            return
+        
+        # Batched recycle-or-discard decision, one per (super-)individual
+        adjusted_probability = np.minimum(
+            0.95, self.model.owner_recycling_probability + network_influence[end_of_life])
+        recycles = self.rng.random(end_of_life.size) < adjusted_probability
+        weight = self.weight[end_of_life]
+        recycled = int(weight[recycles].sum())
+        if self.network is not None:
+            self.recycled_last_year[end_of_life[recycles]] = True
+        
+        # Every end-of-life owner gets a new battery either way, unless the vehicle retires
+        replaced = weight.sum()
+        if retiring is not None:
+            retired = retiring[end_of_life]
+            self.vehicles_retired = int(weight[retired].sum())
+            replaced -= self.vehicles_retired
+        dispatch_batteries(self.model.recyclers, "receive_batteries", recycled, self.dispatch_rng)
+        dispatch_batteries(self.model.manufacturers, "produce_batteries", int(replaced), self.dispatch_rng)
+        
+        battery_age[end_of_life] = 0
+        has_recycled[end_of_life] = False
+        battery_replaced[end_of_life] = True
+        
+        # Retired entries are compacted away, freeing their slots for new owners
+        if self.vehicles_retired:
+            self.keep(np.flatnonzero(~retiring))
+
+def dispatch_batteries(companies, method, count, rng):
+    """Split `count` batteries uniformly at random across `companies`.
+    
+    Equivalent in distribution to each battery picking a company with
+    random.choice, but costs one multinomial draw per year. Populations
+    pass their own generator, or the model's dispatch stream when company
+    choices come from their own stream (common random numbers).
+    """
+    if not companies or count == 0:
+        return
+    shares = rng.multinomial(count, np.full(len(companies), 1 / len(companies)))
+    for company, share in zip(companies, shares):
+        if share:
+            getattr(company, method)(int(share))